@@ -0,0 +1,64 @@
+"""Бенчмарк lesson5-main: Mapmanager.loadLand, запити до карти при різній кількості блоків
+і послідовності кроків Hero.try_move."""
+import random
+
+from common import headless, measure, report
+
+headless('lesson5-main')
+
+from direct.showbase.ShowBase import ShowBase
+from mapmanager import Mapmanager
+from hero import Hero
+from bench import loadTimes
+
+QUERIES = 10000
+
+
+def bench_load(results, tries=5):
+    # замір завантаження спільний з lesson5-main/bench.py --load, щоб вони не розходились
+    for r in loadTimes(['land.txt', 'land2.txt'], tries):
+        results['loadLand[%s,%s]' % (r['file'], r['mode'])] = {
+            'min_ms': r['load_s'] * 1000,
+            'mean_ms': r['mean_s'] * 1000,
+            'repeat': tries,
+            'number': 1,
+        }
+
+
+def bench_queries(results):
+    rng = random.Random(1)
+    land = Mapmanager(chunked=True)
+    for count in (1000, 10000, 100000):
+        side = int(count ** 0.5)
+        land.clear()
+        land.addBlocks((x, y, 0) for x in range(side) for y in range(side))
+        points = [(rng.randrange(side), rng.randrange(side), rng.randrange(3)) for i in range(QUERIES)]
+        name = '[blocks=%d] x%d' % (len(land.blocks), QUERIES)
+        results['findBlocks' + name] = measure(lambda: [land.findBlocks(p) for p in points])
+        results['isEmpty' + name] = measure(lambda: [land.isEmpty(p) for p in points])
+        results['findHighestEmpty' + name] = measure(lambda: [land.findHighestEmpty(p) for p in points])
+    land.clear()
+
+
+def bench_hero(results):
+    land = Mapmanager(chunked=True)
+    x, y = land.loadLand('land.txt')
+    start = (x // 2, y // 2, 2)
+    hero = Hero(start, land)
+    hero.mode = False # ходьба з перевіркою перешкод
+    angles = [0, 90, 180, 270, 45, 135, 225, 315] * 125
+
+    def walk():
+        for angle in angles:
+            hero.try_move(angle)
+
+    results['Hero.try_move x%d' % len(angles)] = measure(walk, setup=lambda: hero.hero.setPos(start))
+
+
+if __name__ == '__main__':
+    ShowBase()
+    results = {}
+    bench_load(results)
+    bench_queries(results)
+    bench_hero(results)
+    report(results)
@@ -0,0 +1,110 @@
+"""Бенчмарк game/my.py: MinecraftClone.create_flat_platform, load_world і реєстр блоків."""
+import json
+import os
+import shutil
+import tempfile
+
+from common import ROOT, headless, measure, report
+
+headless('game')
+
+from panda3d.core import NodePath
+from my import LOG_FILE, PLACE, SAVE_FILE, SAVE_VERSION, SNAPSHOT_FILE, BlockRegistry, MinecraftClone
+
+# приклад збереженого світу
+WORLD_SAVE = os.path.join(ROOT, 'solar system.py', 'world_save.json')
+
+
+def remove_all_blocks(app):
+    """прибирає всі блоки, разом з базовою платформою"""
+    app.clear_dynamic_blocks()
+    app.remove_flat_platform()
+
+
+def bench_platform(app, results):
+    results['create_flat_platform'] = measure(app.create_flat_platform, setup=lambda: remove_all_blocks(app))
+
+
+def remove_binary_save(app):
+    """прибирає знімок і журнал, щоб load_world читав саме JSON"""
+    app.saver.wait()
+    for name in (SNAPSHOT_FILE, LOG_FILE):
+        if os.path.exists(name):
+            os.remove(name)
+
+
+def bench_load_world(app, results):
+    remove_all_blocks(app)
+    app.create_flat_platform()
+    workdir = tempfile.mkdtemp()
+    shutil.copy(WORLD_SAVE, workdir)
+    os.chdir(workdir)
+    try:
+        results['load_world[world_save.json]'] = measure(app.load_world, setup=lambda: remove_binary_save(app))
+        # збудований світ: 3 шари по 20 x 20 блоків над платформою
+        cells = [[i, j, k] for i in range(-10, 10) for j in range(-10, 10) for k in range(1, 4)]
+        with open(SAVE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'version': SAVE_VERSION, 'cells': cells}, f)
+        results['load_world[json, cells=%d]' % len(cells)] = measure(app.load_world, setup=lambda: remove_binary_save(app))
+        # після конвертації - знімок + журнал
+        app.load_world()
+        results['load_world[snapshot, cells=%d]' % len(cells)] = measure(app.load_world)
+        # збереження після однієї зміни: лише дописати запис у журнал
+        cell = (20, 20, 1)
+        app.create_block(cell, is_base=False)
+        # save_world - лише час головного потоку; запис на диск іде у фоні
+        results['save_world[1 change, cells=%d]' % len(cells)] = measure(
+            app.save_world, setup=lambda: app.pending_changes.append((PLACE, cell)))
+        results['save_world[full snapshot, cells=%d]' % len(cells)] = measure(
+            lambda: app.save_world(compact=True), setup=app.saver.wait)
+        app.saver.wait()
+    finally:
+        shutil.rmtree(workdir)
+
+
+def bench_registry(results):
+    """реєстр блоків на 10k і 100k розставлених блоків: перевірка, видалення, очищення динамічних.
+    Для порівняння - старий список (лише 10k: видалення зі списку O(n) на блок).
+    Видаляємо з кінця - найгірший випадок для списку"""
+    for count in (10000, 100000):
+        nodes = [NodePath('Block_%d' % i) for i in range(count)]
+        cells = [(i % 100, i // 100, 1) for i in range(count)]
+        registry = BlockRegistry()
+
+        def fill():
+            registry.__init__()
+            for np, cell in zip(nodes, cells):
+                registry.add(np, cell)
+
+        def remove_all():
+            for np in reversed(nodes):
+                registry.remove(np)
+
+        results['registry.add[%d]' % count] = measure(fill, repeat=3)
+        results['registry.contains[%d]' % count] = measure(lambda: [np in registry for np in nodes],
+                                                           repeat=3, setup=fill)
+        results['registry.remove[%d]' % count] = measure(remove_all, repeat=3, setup=fill)
+        results['registry.clear_dynamic[%d]' % count] = measure(registry.clear_dynamic, repeat=3, setup=fill)
+
+    count = 10000
+    nodes = [NodePath('Block_%d' % i) for i in range(count)]
+    blocks = []
+
+    def fill_list():
+        blocks[:] = nodes
+
+    def remove_list():
+        for np in reversed(nodes):
+            if np in blocks:
+                blocks.remove(np)
+
+    results['list.remove[%d]' % count] = measure(remove_list, repeat=3, setup=fill_list)
+
+
+if __name__ == '__main__':
+    app = MinecraftClone()
+    results = {}
+    bench_platform(app, results)
+    bench_load_world(app, results)
+    bench_registry(results)
+    report(results)
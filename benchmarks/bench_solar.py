@@ -0,0 +1,97 @@
+"""Бенчмарк "solar system.py/f.py": створення сцени, SolarSystemApp.update_task, пояс астероїдів
+і кеш текстур. Час старту залежить від того, чи вже зібраний кеш текстур (texture_cache)."""
+import importlib.util
+import os
+import shutil
+import tempfile
+import time
+
+from common import headless, measure, report
+
+path = headless('solar system.py')
+
+# каталог і файл мають назви, які не імпортуються звичайним import
+spec = importlib.util.spec_from_file_location('solar', os.path.join(path, 'f.py'))
+solar = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(solar)
+
+
+class FakeTask:
+    """update_task бере з задачі лише task.cont"""
+    cont = 1
+
+
+def bench_update(app, results):
+    task = FakeTask()
+    results['update_task'] = measure(lambda: app.update_task(task), number=100)
+    app.follow_target = app.planet_dict['Земля']
+    results['update_task[follow]'] = measure(lambda: app.update_task(task), number=100)
+    app.follow_target = None
+    # перехід на далекий момент часу не залежить від того, наскільки він далекий
+    results['seek_time[1e3]'] = measure(lambda: app.seek_time(1e3), number=100)
+    results['seek_time[1e9]'] = measure(lambda: app.seek_time(1e9), number=100)
+
+
+def bench_belt(app, results):
+    """пояс астероїдів окремо від решти сцени: створення, лише update і кадр (update + renderFrame)
+    у кожному режимі"""
+    app.asteroid_belt.root.hide()
+    cases = [('nodes', 400), ('nodes', 5000)]
+    if solar.np is not None:
+        cases += [('points', 400), ('points', 5000), ('points', 50000)]
+    if solar.supports_instancing(app):
+        cases += [('instanced', 400), ('instanced', 20000)]
+    for mode, count in cases:
+        name = 'AsteroidBelt[%s, %d]' % (mode, count)
+        belts = []
+        results[name] = measure(lambda: belts.append(solar.AsteroidBelt(app, count=count, mode=mode)), repeat=1)
+        belt = belts[0]
+        clock = solar.SimulationClock()
+        results[name + '.update'] = measure(lambda: belt.update(clock.advance(0.016)), number=10)
+
+        def frame():
+            belt.update(clock.advance(0.016))
+            app.graphicsEngine.renderFrame()
+        results[name + '.frame'] = measure(frame, number=10)
+        belt.root.removeNode()
+    app.asteroid_belt.root.show()
+
+
+def bench_textures(app, results):
+    """кеш текстур з нуля (зменшення + mip-рівні + стиснення) і вже зібраний, для найбільшої текстури"""
+    cache_dir = tempfile.mkdtemp()
+    try:
+        for size in ('low', 'high'):
+            cold = solar.TextureLibrary(app.loader, cache_dir)
+            results['texture[oberon.jpg, %s, cold]' % size] = measure(
+                lambda: getattr(cold, size)('oberon.jpg'), repeat=1)
+            warm = solar.TextureLibrary(app.loader, cache_dir)
+            results['texture[oberon.jpg, %s, warm]' % size] = measure(
+                lambda: getattr(warm, size)('oberon.jpg'), repeat=1)
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+def once(ms):
+    """результат одного заміру в мілісекундах у форматі measure"""
+    return {'min_ms': ms, 'mean_ms': ms, 'repeat': 1, 'number': 1}
+
+
+def bench_startup(results):
+    """створення SolarSystemApp, перший кадр і прихід усіх текстур (вантажаться у фоні)"""
+    app = solar.SolarSystemApp()
+    results['SolarSystemApp()'] = once((time.perf_counter() - app.start_time) * 1000)
+    while app.first_frame_time is None or app.textures_ready_time is None:
+        app.taskMgr.step()
+    results['startup.first_frame'] = once(app.first_frame_time * 1000)
+    results['startup.textures_ready'] = once(app.textures_ready_time * 1000)
+    return app
+
+
+if __name__ == '__main__':
+    results = {}
+    app = bench_startup(results)
+    bench_update(app, results)
+    bench_belt(app, results)
+    bench_textures(app, results)
+    report(results)
@@ -0,0 +1,47 @@
+"""Спільне для бенчмарків: Panda3D без вікна, заміри часу та вивід результатів."""
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def headless(project):
+    """готує Panda3D без вікна (window-type offscreen, без звуку) для каталогу проєкту project:
+    робочий каталог, шлях імпорту і model-path вказують на нього. Викликати до створення ShowBase"""
+    path = os.path.join(ROOT, project)
+    os.chdir(path)
+    sys.path.insert(0, path)
+    from panda3d.core import loadPrcFileData
+    loadPrcFileData('', 'window-type offscreen\naudio-library-name null\nmodel-path %s' % path)
+    return path
+
+
+def measure(fn, repeat=5, number=1, setup=None):
+    """виконує fn number разів у кожному з repeat замірів; setup (якщо є) - перед кожним заміром,
+    його час не рахується. Повертає мілісекунди на один виклик fn"""
+    times = []
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for j in range(number):
+            fn()
+        times.append((time.perf_counter() - start) * 1000 / number)
+    return {
+        'min_ms': min(times),
+        'mean_ms': sum(times) / len(times),
+        'repeat': repeat,
+        'number': number,
+    }
+
+
+def report(results):
+    """з --json ФАЙЛ записує результати у файл (так їх збирає run.py), інакше друкує таблицею"""
+    if '--json' in sys.argv:
+        with open(sys.argv[sys.argv.index('--json') + 1], 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1)
+        return
+    for name, r in results.items():
+        print('%-50s %10.3f мс (середнє %.3f)' % (name, r['min_ms'], r['mean_ms']))
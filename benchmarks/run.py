@@ -0,0 +1,92 @@
+"""Запускає всі бенчмарки без вікна і зберігає результати в JSON.
+
+Кожен бенчмарк іде в окремому процесі: у Panda3D на процес може бути лише один ShowBase.
+
+    python benchmarks/run.py                          -> bench_results.json
+    python benchmarks/run.py -o new.json --compare old.json
+--compare показує, що стало повільніше/швидше порівняно з попереднім запуском (напр. з іншого коміту)."""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BENCHES = ['bench_land.py', 'bench_minecraft.py', 'bench_solar.py']
+
+# на скільки має змінитися час, щоб --compare про це сказав
+THRESHOLD = 0.2
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=HERE, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_bench(name):
+    """запускає один бенчмарк в окремому процесі, повертає його результати"""
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        subprocess.run([sys.executable, os.path.join(HERE, name), '--json', path],
+                       check=True, stdout=subprocess.DEVNULL)
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.remove(path)
+
+
+def compare(results, old):
+    """друкує зміни часу порівняно з old (мінімальний час, бо він найменш шумний)"""
+    for bench, benchmarks in results['benchmarks'].items():
+        for name, r in benchmarks.items():
+            before = old['benchmarks'].get(bench, {}).get(name)
+            if before is None:
+                print('%-18s %-48s новий' % (bench, name))
+                continue
+            ratio = r['min_ms'] / before['min_ms'] if before['min_ms'] else float('inf')
+            mark = ''
+            if ratio > 1 + THRESHOLD:
+                mark = '  <- повільніше'
+            elif ratio < 1 - THRESHOLD:
+                mark = '  <- швидше'
+            print('%-18s %-48s %10.3f -> %10.3f мс  x%.2f%s'
+                  % (bench, name, before['min_ms'], r['min_ms'], ratio, mark))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-o', '--output', default='bench_results.json')
+    parser.add_argument('--compare', help='попередній файл результатів')
+    parser.add_argument('benches', nargs='*', default=BENCHES, help='які бенчмарки запускати')
+    args = parser.parse_args()
+
+    import panda3d
+    results = {
+        'commit': git_commit(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'panda3d': panda3d.__version__,
+        'benchmarks': {},
+    }
+    for name in args.benches:
+        print('...', name)
+        results['benchmarks'][os.path.splitext(name)[0]] = run_bench(name)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=1, ensure_ascii=False)
+    print('Результати:', args.output)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
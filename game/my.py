@@ -5,12 +5,172 @@ from direct.task import Task
 from panda3d.core import KeyboardButton, WindowProperties
 from direct.gui.DirectGui import DirectButton, DirectFrame
 from direct.gui.OnscreenText import OnscreenText
-import random, sys, json, os
+import random, sys, json, os, struct, threading, queue
 
 SAVE_FILE = "world_save.json"#GJO0YT
+# Версія старого JSON-формату (SAVE_FILE), який тепер лише читається; нові збереження - бінарні (нижче)
+SAVE_VERSION = 2  # 2: {"version": 2, "cells": [[i, j, k], ...]}; 1 (без версії): [{"x", "y", "z"}, ...]
+
+# Бінарне збереження: знімок (усі динамічні клітинки) + журнал змін після нього.
+# Збереження дописує в журнал лише нові зміни; коли журнал виростає - стискаємо все в новий знімок.
+# JSON (SAVE_FILE) лише читається і при першому завантаженні конвертується в знімок.
+SNAPSHOT_FILE = "world_save.dat"
+LOG_FILE = "world_save.log"
+SNAPSHOT_HEADER = struct.Struct("<4sHI")  # сигнатура, версія, кількість клітинок; далі int16 (i, j, k)
+LOG_HEADER = struct.Struct("<4sH")        # сигнатура, версія; далі записи LOG_RECORD
+LOG_RECORD = struct.Struct("<B3h")        # операція, i, j, k
+CELL = struct.Struct("<3h")
+CELL_MIN, CELL_MAX = -2 ** 15, 2 ** 15 - 1  # межі int16 - лише такі клітинки вміщаються у файл
+BINARY_VERSION = 1
+BREAK, PLACE = 0, 1
+COMPACT_MIN = 1024  # журнал стискається, коли в ньому більше записів, ніж max(COMPACT_MIN, блоків у світі)
+AUTOSAVE_INTERVAL = 60.0  # секунд між автозбереженнями (0 - вимкнено)
+PLATFORM_REGION = 10  # базова платформа ділиться на регіони REGION x REGION блоків, по одному тілу Bullet на регіон
+
+
+def cell_fits(cell):
+    return all(CELL_MIN <= c <= CELL_MAX for c in cell)
+
+
+def write_snapshot(path, cells):
+    # Атомарно: пишемо у тимчасовий файл і підміняємо ним старий
+    cells = list(cells)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(b"MCWS", BINARY_VERSION, len(cells)))
+        f.write(b"".join(CELL.pack(*cell) for cell in cells))
+    os.replace(tmp, path)
+
+
+def read_snapshot(path):
+    with open(path, "rb") as f:
+        magic, version, count = SNAPSHOT_HEADER.unpack(f.read(SNAPSHOT_HEADER.size))
+        if magic != b"MCWS" or version != BINARY_VERSION:
+            raise ValueError(f"{path}: невідомий формат знімка світу")
+        return list(CELL.iter_unpack(f.read(count * CELL.size)))
+
+
+def append_log(path, changes):
+    # changes - список (операція, клітинка); новий журнал починається із заголовка
+    with open(path, "ab") as f:
+        if f.tell() == 0:
+            f.write(LOG_HEADER.pack(b"MCWL", BINARY_VERSION))
+        f.write(b"".join(LOG_RECORD.pack(op, *cell) for op, cell in changes))
+
+
+def read_log(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version = LOG_HEADER.unpack_from(data)
+    if magic != b"MCWL" or version != BINARY_VERSION:
+        raise ValueError(f"{path}: невідомий формат журналу світу")
+    # недописаний останній запис (збій під час запису) відкидаємо
+    end = LOG_HEADER.size + (len(data) - LOG_HEADER.size) // LOG_RECORD.size * LOG_RECORD.size
+    return [(op, (i, j, k)) for op, i, j, k in LOG_RECORD.iter_unpack(data[LOG_HEADER.size:end])]
+
+
+def read_world(snapshot_path, log_path):
+    # Знімок + програні поверх нього зміни з журналу; повертає (клітинки, записів у журналі)
+    cells = dict.fromkeys(read_snapshot(snapshot_path)) if os.path.exists(snapshot_path) else {}
+    changes = read_log(log_path) if os.path.exists(log_path) else []
+    for op, cell in changes:
+        if op == PLACE:
+            cells[cell] = None
+        else:
+            cells.pop(cell, None)
+    return list(cells), len(changes)
+
+
+class SaveWorker:
+    """Фоновий запис світу: завдання з головного потоку пишуться на диск по черзі в окремому потоці"""
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="autosave", daemon=True)
+        self.thread.start()
+
+    def submit(self, changes=None, cells=None):
+        # changes - дописати в журнал; cells - записати новий знімок і почати журнал з нуля
+        self.jobs.put((changes, cells))
+
+    def wait(self):
+        # Дочекатися, поки всі надіслані збереження будуть записані
+        self.jobs.join()
+
+    def run(self):
+        while True:
+            changes, cells = self.jobs.get()
+            try:
+                if cells is not None:
+                    write_snapshot(SNAPSHOT_FILE, cells)
+                    if os.path.exists(LOG_FILE):
+                        os.remove(LOG_FILE)
+                    print(f"✅ Світ збережено у {SNAPSHOT_FILE}")
+                else:
+                    append_log(LOG_FILE, changes)
+                    print(f"✅ Зміни світу дописано у {LOG_FILE}")
+            except Exception as e:
+                # Будь-яка помилка лише пропускає це збереження: потік має жити, інакше wait() зависне
+                print(f"⚠️ Не вдалося зберегти світ: {e}")
+            finally:
+                self.jobs.task_done()
+
+
+class BlockRegistry:
+    """Реєстр блоків: клітинка сітки -> NodePath, окремо базові й динамічні.
+    Додавання, видалення і перевірка належності - O(1)."""
 
-class MinecraftClone(ShowBase):
     def __init__(self):
+        self.cells = {}     # клітинка (i, j, k) -> NodePath блоку
+        self.base = {}      # NodePath базового блоку -> клітинка
+        self.dynamic = {}   # NodePath динамічного блоку -> клітинка (порядок = порядок створення)
+        self.version = 0    # росте при кожній зміні - для кешів, що залежать від набору блоків
+
+    def add(self, np, cell, is_base=False):
+        self.version += 1
+        self.cells[cell] = np
+        if is_base:
+            self.base[np] = cell
+        else:
+            self.dynamic[np] = cell
+
+    def remove(self, np):
+        self.version += 1
+        cell = self.dynamic.pop(np, None)
+        if cell is None:
+            cell = self.base.pop(np)
+        if self.cells.get(cell) is np:
+            del self.cells[cell]
+        return cell
+
+    def get(self, cell):
+        return self.cells.get(cell)
+
+    def is_occupied(self, cell):
+        return cell in self.cells
+
+    def clear_dynamic(self):
+        # Повертає прибрані динамічні блоки
+        self.version += 1
+        removed = self.dynamic
+        for np, cell in removed.items():
+            if self.cells.get(cell) is np:
+                del self.cells[cell]
+        self.dynamic = {}
+        return removed
+
+    def __contains__(self, np):
+        return np in self.dynamic or np in self.base
+
+    def __len__(self):
+        return len(self.base) + len(self.dynamic)
+
+    def __iter__(self):
+        yield from self.base
+        yield from self.dynamic
+
+
+class MinecraftClone(ShowBase):
+    def __init__(self, autosave_interval=AUTOSAVE_INTERVAL, controller="character"):
         ShowBase.__init__(self)
 
         # 🔧 Вікно
@@ -25,8 +185,12 @@ class MinecraftClone(ShowBase):
         self.physics_world.setGravity(Vec3(0, 0, -9.8))
 
         # 📦 Параметри світу
-        self.blocks = []              # всі NodePath блоків (і базових, і динамічних)
-        self.base_positions = set()   # координати базових блоків (щоб не зберігати/не дублювати їх)
+        self.blocks = BlockRegistry() # всі блоки (і базові, і динамічні) за клітинками сітки
+        self.platform_bodies = []     # NodePath статичних тіл регіонів платформи
+        self.pending_changes = []     # зміни (операція, клітинка) з останнього збереження
+        self.log_records = 0          # скільки записів уже в журналі LOG_FILE
+        self.saver = SaveWorker()     # запис на диск - у фоновому потоці
+        self.autosave_interval = autosave_interval
         self.block_size = 1.5
         self.spacing = 1.6
 
@@ -40,6 +204,27 @@ class MinecraftClone(ShowBase):
         self.eye_height = 1.8
         self.ground_snap_distance = 0.2
 
+        # 🧍 Гравець: "character" - капсула BulletCharacterControllerNode (зіткнення, сходинки, стрибок
+        # рахує Bullet); "snap" - стара камера з власною гравітацією і "прилипанням" до землі
+        self.character = None
+        if controller == "character":
+            self.create_character()
+
+        # ⏱️ Фіксований крок симуляції: фізика і гравець рахуються кроками fixed_dt незалежно від FPS,
+        # камера малюється між двома останніми кроками (інтерполяція)
+        self.fixed_dt = 1.0 / 60
+        self.max_substeps = 5         # не більше кроків за кадр - після підвисання не "доганяємо" довго
+        self.accumulator = 0.0
+        self.player_pos = Point3(0, 0, 0)       # позиція гравця на поточному кроці симуляції
+        self.prev_player_pos = Point3(0, 0, 0)  # ... і на попередньому
+
+        # 🪨 Кеш землі під гравцем: (клітинка, чи над блоком, версія блоків) -> верх землі
+        self.ground_key = None
+        self.ground_z = None
+        self.ground_scan = 8  # на скільки клітинок униз шукаємо землю в сітці, перш ніж кидати промінь
+        self.ground_stats = {"raycasts": 0, "grid": 0, "cache": 0}
+        self.stats_time = 0.0
+
         # 💀 Смерть/відродження
         self.death_height = -10
         self.spawn_pos = Point3(0, 0, 10)
@@ -47,6 +232,18 @@ class MinecraftClone(ShowBase):
         # UI
         self.menu_ui = None
         self.respawn_ui = None
+        # Статистика пошуку землі - лише для "snap": капсула землю сама не шукає
+        self.stats_text = None
+        if controller == "snap":
+            self.stats_text = OnscreenText(
+                text="",
+                pos=(-1.3, 0.92),
+                scale=0.05,
+                fg=(1, 1, 1, 1),
+                align=TextNode.ALeft,
+                mayChange=True
+            )
+            self.stats_text.hide()  # гра починається з меню; показуємо в hide_main_menu
 
         # Звуки
         self.place_sound = loader.loadSfx("done.mp3")
@@ -54,6 +251,12 @@ class MinecraftClone(ShowBase):
         self.death_sound = loader.loadSfx("death.mp3")
         self.respawn_sound = loader.loadSfx("born.mp3")
 
+        # Спільний шаблон блоку: модель і форма зіткнення створюються один раз на всі блоки
+        self.block_model = loader.loadModel("block.egg")
+        self.block_model.setScale(self.block_size)
+        half_size = self.block_size / 2
+        self.block_shape = BulletBoxShape(Vec3(half_size, half_size, half_size))
+
         # Керування мишею спочатку для меню (показати курсор)
         self.show_cursor(True)
 
@@ -71,9 +274,15 @@ class MinecraftClone(ShowBase):
 
         # Оновлення
         self.taskMgr.add(self.update, "update")
+        if self.autosave_interval > 0:
+            self.taskMgr.doMethodLater(self.autosave_interval, self.autosave, "autosave")
 
     # ---------- КОРИСНІ МЕТОДИ ----------
     def show_cursor(self, visible: bool):
+        # Без вікна (offscreen/headless, напр. у бенчмарках) курсору немає
+        if not isinstance(self.win, GraphicsWindow):
+            self.center_x = self.center_y = 0
+            return
         props = WindowProperties()
         props.setCursorHidden(not visible)
         self.win.requestProperties(props)
@@ -84,9 +293,11 @@ class MinecraftClone(ShowBase):
             self.win.movePointer(0, self.center_x, self.center_y)
 
     def exit_game(self):
-        # Автозбереження світу перед виходом
+        # Перед виходом дописуємо лише незбережені зміни (без повного знімка)
+        # і чекаємо, поки фоновий запис завершиться
         try:
-            self.save_world()
+            self.save_world(compact=False)
+            self.saver.wait()
         finally:
             sys.exit(0)
 
@@ -144,12 +355,16 @@ class MinecraftClone(ShowBase):
             self.create_main_menu()
         else:
             self.menu_ui.show()
+        if self.stats_text:
+            self.stats_text.hide()
         # Блокуємо гру
         self.game_started = False
 
     def hide_main_menu(self):
         if self.menu_ui:
             self.menu_ui.hide()
+        if self.stats_text:
+            self.stats_text.show()
         self.show_cursor(False)
 
     def start_game(self):
@@ -165,7 +380,7 @@ class MinecraftClone(ShowBase):
         self.is_dead = False
         self.hide_main_menu()
         # Початкова позиція камери
-        self.camera.setPos(0, 0, 5)
+        self.set_player_pos(Point3(0, 0, 5))
         self.pitch = 0
         self.yaw = 0
         self.camera.setHpr(self.yaw, self.pitch, 0)
@@ -224,48 +439,126 @@ class MinecraftClone(ShowBase):
         # Створюємо рівну платформу
         self.create_flat_platform()
         # Камера
-        self.camera.setPos(self.spawn_pos)
+        self.set_player_pos(self.spawn_pos)
         self.pitch = 0
         self.yaw = 0
         self.camera.setHpr(self.yaw, self.pitch, 0)
 
-    def create_block(self, x, y, z, is_base=False):
-        half_size = self.block_size / 2
-        shape = BulletBoxShape(Vec3(half_size, half_size, half_size))
-        node = BulletRigidBodyNode(f'Block_{x}_{y}_{z}')
-        node.addShape(shape)
+    def create_block(self, cell, is_base=False):
+        np = self.make_block(cell, is_base)
+        self.physics_world.attachRigidBody(np.node())
+
+        # Відтворення звуку при створенні блоку (масове створення - create_blocks - без звуку)
+        self.place_sound.play()
+        return np
+
+    def create_blocks(self, cells, is_base=False):
+        # Масове створення (завантаження світу): спільний шаблон, тіла додаються
+        # у фізику одним проходом після створення всіх блоків, без звуку
+        created = [self.make_block(cell, is_base) for cell in cells]
+        attach = self.physics_world.attachRigidBody
+        for np in created:
+            attach(np.node())
+        return created
+
+    def make_block(self, cell, is_base=False):
+        # Блок з тілом Bullet (ще не доданим у фізику) і візуалом - екземпляром спільної моделі
+        node = BulletRigidBodyNode('Block_%d_%d_%d' % cell)
+        node.addShape(self.block_shape)
         node.setMass(0)
 
         np = render.attachNewNode(node)
-        np.setPos(x, y, z)
+        np.setPos(self.cell_to_world(cell))
+        np.setColor(self.block_color(cell))
         node.setPythonTag("nodepath", np)
         node.setPythonTag("is_base", is_base)
-        self.physics_world.attachRigidBody(node)
-
-        visual = loader.loadModel("block.egg")
-        visual.setScale(self.block_size)
+        self.block_model.instanceTo(np)
 
-        r = random.uniform(0.4, 1.0)
-        g = random.uniform(0.6, 1.0)
-        b = random.uniform(0.4, 1.0)
-        visual.setColor(r, g, b, 1)
-
-        visual.reparentTo(np)
-        self.blocks.append(np)
-
-        # Відтворення звуку при створенні блоку (не для масового створення?)
-        self.place_sound.play()
+        self.blocks.add(np, cell, is_base)
         return np
 
+    def block_color(self, cell):
+        # Колір блоку залежить лише від клітинки, тож після перезавантаження світ виглядає так само
+        i, j, k = cell
+        rng = random.Random((i * 73856093) ^ (j * 19349663) ^ (k * 83492791))
+        return (rng.uniform(0.4, 1.0), rng.uniform(0.6, 1.0), rng.uniform(0.4, 1.0), 1)
+
     def create_flat_platform(self):
+        # Базова платформа незмінна: замість тіла Bullet на кожен блок -
+        # одне складене (compound) статичне тіло на регіон PLATFORM_REGION x PLATFORM_REGION
         grid_size = 30
+        regions = {}
         for x in range(-grid_size // 2, grid_size // 2):
             for y in range(-grid_size // 2, grid_size // 2):
-                bx = x * self.spacing
-                by = y * self.spacing
-                bz = 0
-                self.create_block(bx, by, bz, is_base=True)
-                self.base_positions.add((bx, by, bz))
+                cell = (x, y, 0)
+                self.create_base_block(cell)
+                regions.setdefault((x // PLATFORM_REGION, y // PLATFORM_REGION), []).append(cell)
+
+        for (rx, ry), cells in regions.items():
+            node = BulletRigidBodyNode(f'Platform_{rx}_{ry}')
+            for cell in cells:
+                node.addShape(self.block_shape, TransformState.makePos(self.cell_to_world(cell)))
+            node.setMass(0)
+            node.setPythonTag("is_base", True)
+            self.physics_world.attachRigidBody(node)
+            self.platform_bodies.append(render.attachNewNode(node))
+
+    def create_base_block(self, cell):
+        # Лише візуал: зіткнення базових блоків дає тіло регіону платформи
+        np = render.attachNewNode('Block_%d_%d_%d' % cell)
+        np.setPos(self.cell_to_world(cell))
+        np.node().setPythonTag("nodepath", np)
+        np.node().setPythonTag("is_base", True)
+        np.setColor(self.block_color(cell))
+        self.block_model.instanceTo(np)
+
+        self.blocks.add(np, cell, is_base=True)
+        return np
+
+    def remove_flat_platform(self):
+        for body in self.platform_bodies:
+            self.physics_world.removeRigidBody(body.node())
+            body.removeNode()
+        self.platform_bodies = []
+        for np in list(self.blocks.base):
+            np.removeNode()
+            self.blocks.remove(np)
+
+    def block_from_hit(self, result, direction):
+        # Блок, у який влучив промінь: динамічний - з тегу свого тіла,
+        # базовий - за точкою влучання (тіло регіону спільне на багато блоків)
+        hit_node = result.getNode()
+        np = hit_node.getPythonTag("nodepath")
+        if np:
+            return np
+        # трохи заглиблюємося в блок уздовж променя і беремо його клітинку
+        p = result.getHitPos() + direction * 0.05
+        return self.blocks.get(self.world_to_cell(p.x, p.y, p.z))
+
+    # ---------- СІТКА ----------
+    # Блоки стоять у вузлах сітки з кроком spacing. Клітинка - цілі (i, j, k),
+    # тому пошук у множинах/словниках точний, без похибок float.
+    def world_to_cell(self, x, y, z):
+        # Клітинка сітки, у яку потрапляє точка світу
+        return (round(x / self.spacing), round(y / self.spacing), round(z / self.spacing))
+
+    def cell_to_world(self, cell):
+        # Центр блоку клітинки у координатах світу
+        i, j, k = cell
+        return Point3(i * self.spacing, j * self.spacing, k * self.spacing)
+
+    def block_overlaps_character(self, cell):
+        # Капсула = вертикальний відрізок + радіус. Вона може зачепити до трьох клітинок по висоті
+        # і сусідні клітинки збоку, тому порівнюємо сам куб блоку з капсулою, а не клітинки
+        center = self.cell_to_world(cell)
+        half = self.block_size / 2
+        pos = self.character_np.getPos()
+        r = self.character_radius
+        seg_half = self.eye_height / 2 - r  # половина довжини осі капсули
+        dx = max(abs(pos.x - center.x) - half, 0.0)
+        dy = max(abs(pos.y - center.y) - half, 0.0)
+        dz = max(abs(pos.z - center.z) - half - seg_half, 0.0)
+        return dx * dx + dy * dy + dz * dz < r * r
 
     # ---------- ЖИТТЯ / СМЕРТЬ ----------
     def player_died(self):
@@ -280,7 +573,7 @@ class MinecraftClone(ShowBase):
 
     def respawn_player(self):
         print("🧬 Відродження!")
-        self.camera.setPos(self.spawn_pos)
+        self.set_player_pos(self.spawn_pos)
         self.velocity_z = 0.0
         self.is_jumping = False
         self.is_dead = False
@@ -288,6 +581,28 @@ class MinecraftClone(ShowBase):
         self.hide_respawn_ui()
 
     # ---------- ІГРОВА ЛОГІКА ----------
+    def create_character(self):
+        # Капсула заввишки eye_height; камера (очі) - на її верхівці
+        self.character_radius = 0.4
+        shape = BulletCapsuleShape(self.character_radius, self.eye_height - 2 * self.character_radius, ZUp)
+        self.character = BulletCharacterControllerNode(shape, 0.5, "Player")  # 0.5 - висота сходинки
+        self.character.setGravity(9.8)
+        self.character.setJumpSpeed(self.jump_speed)
+        self.character.setMaxJumpHeight(2.0)
+        self.character_np = render.attachNewNode(self.character)
+        self.physics_world.attachCharacter(self.character)
+        self.eye_offset = Vec3(0, 0, self.eye_height / 2)  # від центру капсули до очей
+
+    def set_player_pos(self, pos):
+        # Переміщення без інтерполяції (старт, відродження)
+        self.player_pos = Point3(pos)
+        self.prev_player_pos = Point3(pos)
+        self.accumulator = 0.0
+        self.camera.setPos(pos)
+        if self.character:
+            self.character_np.setPos(pos - self.eye_offset)
+            self.character.setLinearMovement(Vec3(0, 0, 0), False)
+
     def update(self, task):
         dt = globalClock.getDt()
 
@@ -295,8 +610,6 @@ class MinecraftClone(ShowBase):
         if not self.game_started or self.is_dead:
             return Task.cont
 
-        self.physics_world.doPhysics(dt)
-
         is_down = base.mouseWatcherNode.is_button_down
         direction = Vec3(0, 0, 0)
 
@@ -309,8 +622,9 @@ class MinecraftClone(ShowBase):
             direction.x -= 1
         if is_down(KeyboardButton.ascii_key('d')):
             direction.x += 1
+        jump = is_down(KeyboardButton.space())
 
-        # 🎯 Мишка — обертання
+        # 🎯 Мишка — обертання (щокадру, поза фіксованим кроком)
         if self.mouseWatcherNode.hasMouse():
             md = self.win.getPointer(0)
             dx = md.getX() - self.center_x
@@ -322,55 +636,146 @@ class MinecraftClone(ShowBase):
             self.camera.setHpr(self.yaw, self.pitch, 0)
             self.win.movePointer(0, self.center_x, self.center_y)
 
+        # ⏱️ Скільки цілих кроків fixed_dt накопичилось з минулого кадру
+        self.accumulator += dt
+        steps = 0
+        while self.accumulator >= self.fixed_dt and steps < self.max_substeps:
+            self.prev_player_pos = Point3(self.player_pos)
+            self.step(direction, jump, self.fixed_dt)
+            self.accumulator -= self.fixed_dt
+            steps += 1
+            if self.is_dead:
+                return Task.cont
+        if steps == self.max_substeps:
+            # кадр підвис - решту часу відкидаємо, а не переносимо на наступні кадри
+            self.accumulator = min(self.accumulator, self.fixed_dt)
+
+        # 🎥 Камера - між двома останніми кроками
+        alpha = self.accumulator / self.fixed_dt
+        self.camera.setPos(self.prev_player_pos + (self.player_pos - self.prev_player_pos) * alpha)
+        self.update_stats()
+        return Task.cont
+
+    def step_character(self, direction, jump, dt):
+        # Рух, зіткнення з блоками, сходинки і падіння рахує Bullet; тут лише задаємо швидкість
+        cam_vec = self.camera.getQuat().getForward()
+        right_vec = self.camera.getQuat().getRight()
+        move_vec = (cam_vec * direction.y + right_vec * direction.x)
+        move_vec.z = 0
+        if move_vec.length_squared() > 0:
+            move_vec.normalize()
+        self.character.setLinearMovement(move_vec * self.speed, False)
+
+        if jump and self.character.isOnGround():
+            self.character.doJump()
+
+        self.physics_world.doPhysics(dt, 0)
+        self.player_pos = self.character_np.getPos() + self.eye_offset
+
+        # 💀 Перевірка на смерть при падінні
+        if (self.player_pos.z < self.death_height) and (not self.is_dead):
+            self.player_died()
+
+    def ground_top(self, pos):
+        # Верх землі під точкою pos (z) або None. Відповідь не змінюється, поки точка в тій самій
+        # клітинці і блоки ті самі, тож перераховуємо лише при переході клітинки чи зміні блоків
+        cell = self.world_to_cell(pos.x, pos.y, pos.z)
+        i, j, k = cell
+        half_size = self.block_size / 2
+        # між блоками щілина (spacing > block_size) - у ній промінь нікуди не влучає
+        over_block = (abs(pos.x - i * self.spacing) <= half_size
+                      and abs(pos.y - j * self.spacing) <= half_size)
+        key = (cell, over_block, self.blocks.version)
+        if key == self.ground_key:
+            self.ground_stats["cache"] += 1
+            return self.ground_z
+        self.ground_key = key
+        self.ground_z = None
+        if not over_block:
+            return None
+
+        # Спершу - сітка: найвищий зайнятий блок стовпця під точкою
+        for kk in range(k, k - self.ground_scan, -1):
+            top_z = kk * self.spacing + half_size
+            if top_z <= pos.z and self.blocks.is_occupied((i, j, kk)):
+                self.ground_stats["grid"] += 1
+                self.ground_z = top_z
+                return top_z
+
+        # Близько нічого немає - рейтрейс вниз
+        self.ground_stats["raycasts"] += 1
+        result = self.physics_world.rayTestClosest(Point3(pos), Point3(pos.x, pos.y, pos.z - 100.0))
+        if result.hasHit():
+            self.ground_z = result.getHitPos().z
+        return self.ground_z
+
+    def update_stats(self):
+        # Раз на секунду: скільки разів за секунду землю шукали променем / у сітці / брали з кешу
+        if self.stats_text is None:
+            return
+        now = globalClock.getFrameTime()
+        elapsed = now - self.stats_time
+        if elapsed < 1.0:
+            return
+        stats = self.ground_stats
+        self.stats_text.setText(
+            f"raycasts/s: {stats['raycasts'] / elapsed:.0f}  "
+            f"grid/s: {stats['grid'] / elapsed:.0f}  cache/s: {stats['cache'] / elapsed:.0f}"
+        )
+        self.ground_stats = {"raycasts": 0, "grid": 0, "cache": 0}
+        self.stats_time = now
+
+    def step(self, direction, jump, dt):
+        # Один крок симуляції: однакові вхідні дані дають однаковий результат (можна відтворити)
+        if self.character:
+            self.step_character(direction, jump, dt)
+            return
+
+        self.physics_world.doPhysics(dt, 0)
+
         # 🎮 Рух у напрямку камери (горизонтально)
         cam_vec = self.camera.getQuat().getForward()
         right_vec = self.camera.getQuat().getRight()
         move_vec = (cam_vec * direction.y + right_vec * direction.x)
         if move_vec.length_squared() > 0:
             move_vec.normalize()
-            self.camera.setPos(self.camera.getPos() + move_vec * self.speed * dt)
+            self.player_pos += move_vec * self.speed * dt
 
-        # 👣 Перевірка землі під камерою (рейтрейс вниз)
-        cam_pos = self.camera.getPos()
-        ray_from = Point3(cam_pos.x, cam_pos.y, cam_pos.z)
-        ray_to   = Point3(cam_pos.x, cam_pos.y, cam_pos.z - 100.0)
-        result = self.physics_world.rayTestClosest(ray_from, ray_to)
+        # 👣 Земля під гравцем
+        pos = self.player_pos
+        ground_top_z = self.ground_top(pos)
 
-        ground_available = result.hasHit()
+        ground_available = ground_top_z is not None
         target_ground_cam_z = None
         if ground_available:
-            hit_pos = result.getHitPos()
-            ground_top_z = hit_pos.z
             target_ground_cam_z = ground_top_z + self.eye_height
 
         # ⏫ Стрибок
         is_on_ground = False
         if ground_available:
-            if (self.camera.getZ() <= target_ground_cam_z + self.ground_snap_distance
+            if (pos.z <= target_ground_cam_z + self.ground_snap_distance
                 and self.velocity_z <= 0.05):
                 is_on_ground = True
 
-        if is_down(KeyboardButton.space()) and is_on_ground:
+        if jump and is_on_ground:
             self.velocity_z = self.jump_speed
             self.is_jumping = True
 
         # 🪂 Гравітація + “прилипання” до землі
         self.velocity_z += -9.8 * dt
-        new_z = self.camera.getZ() + self.velocity_z * dt
+        new_z = pos.z + self.velocity_z * dt
 
         if ground_available and self.velocity_z <= 0 and new_z <= target_ground_cam_z:
             new_z = target_ground_cam_z
             self.velocity_z = 0.0
             self.is_jumping = False
 
-        self.camera.setZ(new_z)
+        self.player_pos.z = new_z
 
         # 💀 Перевірка на смерть при падінні
-        if (self.camera.getZ() < self.death_height) and (not self.is_dead):
+        if (new_z < self.death_height) and (not self.is_dead):
             self.player_died()
 
-        return Task.cont
-
     # ---------- ВЗАЄМОДІЯ З БЛОКАМИ ----------
     def place_block(self):
         if self.is_dead or not self.game_started:
@@ -379,15 +784,17 @@ class MinecraftClone(ShowBase):
         origin = self.camera.getPos()
         target_pos = origin + direction * 2.0
 
-        x = round(target_pos.x / self.spacing) * self.spacing
-        y = round(target_pos.y / self.spacing) * self.spacing
-        z = round(target_pos.z / self.spacing) * self.spacing
+        cell = self.world_to_cell(target_pos.x, target_pos.y, target_pos.z)
 
-        # Ігноруємо, якщо намагаємось ставити в позицію базової платформи (можна дозволити — за бажанням)
-        if (x, y, z) in self.base_positions:
+        # Клітинка вже зайнята (базовим чи динамічним блоком) - не ставимо другий блок у те саме місце
+        if self.blocks.is_occupied(cell):
+            return
+        # Капсула гравця не повинна опинитися всередині нового блоку
+        if self.character and self.block_overlaps_character(cell):
             return
 
-        self.create_block(x, y, z, is_base=False)
+        self.create_block(cell, is_base=False)
+        self.pending_changes.append((PLACE, cell))
 
     def break_block(self):
         if self.is_dead or not self.game_started:
@@ -399,71 +806,101 @@ class MinecraftClone(ShowBase):
 
         result = self.physics_world.rayTestClosest(ray_from, ray_to)
         if result.hasHit():
-            hit_node = result.getNode()
-            np = hit_node.getPythonTag("nodepath")
+            np = self.block_from_hit(result, direction)
 
             if np and np in self.blocks:
+                hit_node = np.node()
                 # Не дозволяємо ламати базову платформу
                 if hit_node.getPythonTag("is_base"):
                     return
 
                 self.physics_world.removeRigidBody(hit_node)
                 np.removeNode()
-                self.blocks.remove(np)
+                self.pending_changes.append((BREAK, self.blocks.remove(np)))
 
                 # Відтворення звуку при знищенні блоку
                 self.break_sound.play()
 
     # ---------- ЗБЕРЕЖЕННЯ / ЗАВАНТАЖЕННЯ ----------
-    def save_world(self):
-        # Зберігаємо лише НЕбазові блоки (динамічні)
-        data = []
-        for np in self.blocks:
-            node = np.node()
-            if node.getPythonTag("is_base"):
-                continue
-            pos = np.getPos()
-            data.append({"x": float(pos.x), "y": float(pos.y), "z": float(pos.z)})
+    def save_world(self, compact=None):
+        # Головний потік лише забирає зміни з останнього збереження (або копію клітинок для
+        # нового знімка), а пише їх на диск SaveWorker - гра не чекає на диск
+        changes, self.pending_changes = self.pending_changes, []
+        # Клітинки поза int16 у файл не вмістяться - пропускаємо їх, а не ламаємо збереження
+        skipped = [cell for _, cell in changes if not cell_fits(cell)]
+        if skipped:
+            print(f"⚠️ Пропущено {len(skipped)} змін за межами світу, що зберігається: {skipped[0]}...")
+            changes = [(op, cell) for op, cell in changes if cell_fits(cell)]
+        self.log_records += len(changes)
+        if compact is None:
+            # журнал виріс більше за сам світ - стискаємо в новий знімок (лише НЕбазові блоки)
+            compact = self.log_records > max(COMPACT_MIN, len(self.blocks.dynamic))
+        if compact:
+            self.saver.submit(cells=[cell for cell in self.blocks.dynamic.values() if cell_fits(cell)])
+            self.log_records = 0
+        elif changes:
+            self.saver.submit(changes=changes)
+
+    def autosave(self, task):
+        if self.game_started and self.pending_changes:
+            self.save_world()
+        task.delayTime = self.autosave_interval
+        return task.again
 
-        with open(SAVE_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f)
-        print(f"✅ Світ збережено у {SAVE_FILE}")
+    def read_save_cells(self, data):
+        # Клітинки з JSON-збереження: версія 2 - готові клітинки,
+        # старий - список координат світу {"x", "y", "z"} у float
+        if isinstance(data, dict):
+            return [tuple(cell) for cell in data["cells"]]
+        return [self.world_to_cell(float(b["x"]), float(b["y"]), float(b["z"])) for b in data]
 
     def clear_dynamic_blocks(self):
         # Видалити всі динамічні блоки перед завантаженням, щоб не дублювати
-        to_remove = []
-        for np in self.blocks:
-            node = np.node()
-            if not node.getPythonTag("is_base"):
-                to_remove.append(np)
-        for np in to_remove:
-            node = np.node()
-            self.physics_world.removeRigidBody(node)
+        for np in self.blocks.clear_dynamic():
+            self.physics_world.removeRigidBody(np.node())
             np.removeNode()
-            self.blocks.remove(np)
 
     def load_world(self):
-        if not os.path.exists(SAVE_FILE):
+        # Спершу дописуємо те, що ще пишеться у фоні
+        self.saver.wait()
+        converted = False
+        if os.path.exists(SNAPSHOT_FILE) or os.path.exists(LOG_FILE):
+            saved, self.log_records = read_world(SNAPSHOT_FILE, LOG_FILE)
+        elif os.path.exists(SAVE_FILE):
+            # Старе JSON-збереження - після завантаження запишемо його як бінарний знімок
+            with open(SAVE_FILE, "r", encoding="utf-8") as f:
+                saved = self.read_save_cells(json.load(f))
+            converted = True
+        else:
             print("ℹ️ Немає збереженого світу.")
             return
 
         # Очищуємо динамічні блоки перед завантаженням
         self.clear_dynamic_blocks()
 
-        with open(SAVE_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        for block_data in data:
-            x = float(block_data["x"])
-            y = float(block_data["y"])
-            z = float(block_data["z"])
-            # захист від випадкового дублювання базових
-            if (x, y, z) in self.base_positions:
+        cells = []
+        seen = set()
+        duplicates = 0
+        for cell in saved:
+            # захист від дублювання базових і повторів у старих збереженнях
+            if cell in seen or self.blocks.is_occupied(cell):
+                duplicates += 1
                 continue
-            self.create_block(x, y, z, is_base=False)
+            seen.add(cell)
+            cells.append(cell)
+        self.create_blocks(cells)
+        self.pending_changes = []
+
+        if duplicates:
+            print(f"🧹 Прибрано дублікатів: {duplicates}")
+        # Конвертоване або з дублікатами - одразу перезаписуємо чистим знімком
+        if converted or duplicates:
+            self.save_world(compact=True)
 
         print("🌍 Світ завантажено!")
 
 # Запуск
-app = MinecraftClone()
-app.run()
+if __name__ == "__main__":
+    # --snap: старий гравець-камера без зіткнень замість контролера Bullet
+    app = MinecraftClone(controller="snap" if "--snap" in sys.argv else "character")
+    app.run()
@@ -0,0 +1,106 @@
+"""Замер карты без окна: время загрузки, число draw calls и время кадра
+для обычного режима (модель на каждый блок) и режима чанков.
+
+Запуск: python bench.py [файл карты] [--repeat N] [--frames N]
+--repeat N раскладывает карту N x N раз, чтобы посмотреть, как растёт цена большой карты.
+
+python bench.py --load land.txt land2.txt - только время loadLand по каждому файлу."""
+import argparse
+import time
+
+from panda3d.core import loadPrcFileData
+loadPrcFileData('', 'window-type offscreen\naudio-library-name null')
+
+from direct.showbase.ShowBase import ShowBase
+from mapmanager import Mapmanager
+
+
+def loadRepeated(land, filename, repeat):
+    """загружает карту и дублирует её блоки repeat x repeat раз, возвращает размеры одной копии"""
+    width, height = land.loadLand(filename)
+    if repeat > 1:
+        blocks = list(land.blocks)
+        land.beginBatch()
+        for i in range(repeat):
+            for j in range(repeat):
+                if i or j:
+                    for x, y, z in blocks:
+                        land.addBlock((x + i * width, y + j * height, z))
+        land.endBatch()
+    return width, height
+
+
+def drawCalls(land):
+    """число Geom под узлом карты - столько draw calls уходит на карту за кадр"""
+    return sum(np.node().getNumGeoms() for np in land.findAllMatches('**/+GeomNode'))
+
+
+def frameTime(frames):
+    """среднее время кадра в миллисекундах"""
+    base.graphicsEngine.renderFrame()
+    start = time.perf_counter()
+    for i in range(frames):
+        base.graphicsEngine.renderFrame()
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def loadTimes(filenames, tries):
+    """лучшее и среднее из tries время loadLand по каждому файлу в обоих режимах
+    (им же пользуется benchmarks/bench_land.py)"""
+    results = []
+    for chunked in (False, True):
+        land = Mapmanager(chunked=chunked)
+        for filename in filenames:
+            times = []
+            for i in range(tries):
+                start = time.perf_counter()
+                land.loadLand(filename)
+                times.append(time.perf_counter() - start)
+            results.append({
+                'mode': 'chunks' if chunked else 'blocks',
+                'file': filename,
+                'blocks': len(land.blocks),
+                'load_s': min(times),
+                'mean_s': sum(times) / len(times),
+            })
+        land.land.removeNode()
+    return results
+
+
+def run(filename, repeat, frames):
+    results = []
+    for chunked in (False, True):
+        land = Mapmanager(chunked=chunked)
+        start = time.perf_counter()
+        loadRepeated(land, filename, repeat)
+        loadTime = time.perf_counter() - start
+        results.append({
+            'mode': 'chunks' if chunked else 'blocks',
+            'blocks': len(land.blocks),
+            'load_s': loadTime,
+            'draw_calls': drawCalls(land.land),
+            'frame_ms': frameTime(frames),
+        })
+        land.land.removeNode()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('filename', nargs='*', default=['land.txt'])
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--frames', type=int, default=50)
+    parser.add_argument('--load', action='store_true', help='замерить только loadLand')
+    parser.add_argument('--tries', type=int, default=5)
+    args = parser.parse_args()
+
+    ShowBase()
+    if args.load:
+        for r in loadTimes(args.filename, args.tries):
+            print('%(mode)-7s %(file)-10s блоков: %(blocks)6d  загрузка: %(load_s)7.4f с' % r)
+        raise SystemExit
+    base.camera.setPos(10, -30, 25)
+    base.camera.lookAt(10, 20, 0)
+    for r in run(args.filename[0], args.repeat, args.frames):
+        print('%(mode)-7s блоков: %(blocks)6d  загрузка: %(load_s)6.2f с  '
+              'draw calls: %(draw_calls)6d  кадр: %(frame_ms)7.2f мс' % r)
@@ -0,0 +1,92 @@
+from panda3d.core import (Geom, GeomNode, GeomTriangles, GeomVertexData,
+                          GeomVertexFormat, GeomVertexReader, GeomVertexWriter)
+
+CHUNK_SIZE = 16 # размер чанка в клетках по x и по y
+
+
+def chunkKey(pos):
+    """возвращает ключ чанка, в который попадает клетка pos"""
+    return (pos[0] // CHUNK_SIZE, pos[1] // CHUNK_SIZE)
+
+
+def axis(vector):
+    """округляет вектор до ближайшего направления вдоль оси: (1, 0, 0), (0, 0, -1) и т.д."""
+    i = max(range(3), key=lambda k: abs(vector[k]))
+    result = [0, 0, 0]
+    result[i] = 1 if vector[i] > 0 else -1
+    return tuple(result)
+
+
+class BlockTemplate():
+    """ Геометрия кубика из block.egg, разложенная по граням """
+    def __init__(self, model):
+        # направление грани (совпадает со смещением к соседней клетке) -> треугольники,
+        # каждый треугольник - три пары (вершина, uv)
+        self.faces = {}
+        model.flattenStrong()
+        for geomNp in model.findAllMatches('**/+GeomNode'):
+            node = geomNp.node()
+            for i in range(node.getNumGeoms()):
+                self.readGeom(node.getGeom(i))
+
+    def readGeom(self, geom):
+        vdata = geom.getVertexData()
+        vertex = GeomVertexReader(vdata, 'vertex')
+        texcoord = GeomVertexReader(vdata, 'texcoord')
+        for prim in geom.getPrimitives():
+            prim = prim.decompose()
+            for i in range(prim.getNumPrimitives()):
+                points = []
+                for j in range(prim.getPrimitiveStart(i), prim.getPrimitiveEnd(i)):
+                    row = prim.getVertex(j)
+                    vertex.setRow(row)
+                    texcoord.setRow(row)
+                    points.append((tuple(vertex.getData3()), tuple(texcoord.getData2())))
+                (a, _), (b, _), (c, _) = points
+                u = [b[k] - a[k] for k in range(3)]
+                v = [c[k] - a[k] for k in range(3)]
+                normal = (u[1] * v[2] - u[2] * v[1],
+                          u[2] * v[0] - u[0] * v[2],
+                          u[0] * v[1] - u[1] * v[0])
+                self.faces.setdefault(axis(normal), []).append(points)
+
+
+class Chunk():
+    """ Кусок карты CHUNK_SIZE x CHUNK_SIZE клеток, нарисованный одним GeomNode """
+    def __init__(self, key, parent):
+        self.key = key
+        self.blocks = set() # целые координаты блоков чанка
+        self.np = parent.attachNewNode(GeomNode('chunk-%d-%d' % key))
+
+    def build(self, template, isFilled, getColor):
+        """пересобирает геометрию чанка; рисуются только грани, у которых нет соседнего блока"""
+        vdata = GeomVertexData('chunk', GeomVertexFormat.getV3n3c4t2(), Geom.UHStatic)
+        vertex = GeomVertexWriter(vdata, 'vertex')
+        normal = GeomVertexWriter(vdata, 'normal')
+        color = GeomVertexWriter(vdata, 'color')
+        texcoord = GeomVertexWriter(vdata, 'texcoord')
+        tris = GeomTriangles(Geom.UHStatic)
+        count = 0
+        for x, y, z in self.blocks:
+            rgba = getColor(z)
+            for (dx, dy, dz), triangles in template.faces.items():
+                if isFilled((x + dx, y + dy, z + dz)):
+                    continue
+                for points in triangles:
+                    for (px, py, pz), (u, v) in points:
+                        vertex.addData3(x + px, y + py, z + pz)
+                        normal.addData3(dx, dy, dz)
+                        color.addData4(*rgba)
+                        texcoord.addData2(u, v)
+                    tris.addConsecutiveVertices(count, 3)
+                    count += 3
+
+        node = self.np.node()
+        node.removeAllGeoms()
+        if count:
+            geom = Geom(vdata)
+            geom.addPrimitive(tris)
+            node.addGeom(geom)
+
+    def removeNode(self):
+        self.np.removeNode()
@@ -1,14 +1,31 @@
+import sys
 from direct.showbase.ShowBase import ShowBase
+from direct.gui.DirectGui import DirectWaitBar
 from mapmanager import Mapmanager
+from terrain import Terrain
 from hero import Hero
 
 class Game(ShowBase):
     def __init__(self):
         ShowBase.__init__(self)
-        self.land = Mapmanager()
-        x,y = self.land.loadLand("land.txt")
-        self.hero = Hero((x//2,y//2,2),self.land)
+        self.land = Mapmanager(chunked=True)
+        if '--procedural' in sys.argv:
+            # бесконечная карта: python game.py --procedural [seed]
+            args = sys.argv[sys.argv.index('--procedural') + 1:]
+            terrain = Terrain(seed=int(args[0]) if args else 0)
+            self.hero = Hero((0, 0, terrain.height(0, 0) + 1), self.land)
+            self.land.loadTerrain(terrain, self.hero.hero)
+        else:
+            # полоска загрузки, пока карта строится по частям
+            self.loading = DirectWaitBar(text="", value=0, range=100, pos=(0, 0, -0.9), scale=0.5)
+            x,y = self.land.loadLandAsync("land.txt", self.showProgress, self.loading.destroy)
+            self.hero = Hero((x//2,y//2,2),self.land)
+        # дальние чанки не рисуем
+        self.land.setViewRadius(48, self.hero.hero)
         base.camLens.setFov(90)
 
+    def showProgress(self, part):
+        self.loading['value'] = part * 100
+
 game = Game()
 game.run()
\ No newline at end of file
@@ -1,7 +1,98 @@
+import os
 import pickle
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+from chunks import CHUNK_SIZE, BlockTemplate, Chunk, chunkKey
+
+try:
+    import numpy as np
+except ImportError: # без NumPy карта грузится построчно
+    np = None
+
+# формат файла карты: сигнатура, версия, число блоков (little-endian)
+MAP_MAGIC = b'MAPB'
+MAP_VERSION = 1
+MAP_HEADER = struct.Struct('<4sHI')
+
+# примерный расход памяти Python на один блок в индексе (для Mapmanager.stats)
+BLOCK_BYTES = 250
+
+
+def writeBlocks(filename, positions):
+    """пишет позиции блоков в бинарный файл:
+    заголовок MAP_MAGIC, версия и число блоков, затем тройки int16 (x, y, z) одним массивом"""
+    blocks = array('h')
+    for pos in positions:
+        blocks.extend(pos)
+    if sys.byteorder == 'big':
+        blocks.byteswap()
+    # открываем бинарный файл на запись
+    with open(filename, 'wb') as fout:
+        fout.write(MAP_HEADER.pack(MAP_MAGIC, MAP_VERSION, len(blocks) // 3))
+        blocks.tofile(fout)
+
+
+def readBlocks(filename):
+    """читает позиции блоков из файла writeBlocks или из старого файла с pickle на каждый блок"""
+    # открываем бинарный файл на чтение
+    with open(filename, 'rb') as fin:
+        header = fin.read(MAP_HEADER.size)
+        if header[:len(MAP_MAGIC)] != MAP_MAGIC:
+            fin.seek(0)
+            return readPickleBlocks(fin)
+        magic, version, length = MAP_HEADER.unpack(header)
+        if version != MAP_VERSION:
+            raise ValueError("неизвестная версия карты %d в %s" % (version, filename))
+        blocks = array('h')
+        blocks.fromfile(fin, 3 * length)
+    if sys.byteorder == 'big':
+        blocks.byteswap()
+    return list(zip(blocks[0::3], blocks[1::3], blocks[2::3]))
+
+
+def readPickleBlocks(fin):
+    """читает старый формат: количество блоков, затем pickle позиции каждого блока"""
+    # считываем количество блоков
+    length = pickle.load(fin)
+    # считываем позиции
+    return [pickle.load(fin) for i in range(length)]
+
+
+class Column():
+    """ Столбец карты: занятые высоты в одной клетке (x, y) """
+    def __init__(self):
+        self.heights = set() # занятые z
+        self.top = None      # самый верхний занятый z
+        self.free = 1        # первая свободная высота, начиная с z = 1
+
+    def add(self, z):
+        self.heights.add(z)
+        if self.top is None or z > self.top:
+            self.top = z
+        # закрыли дырку - поднимаемся до следующей свободной высоты
+        while self.free in self.heights:
+            self.free += 1
+
+    def remove(self, z):
+        self.heights.discard(z)
+        if 1 <= z < self.free:
+            self.free = z
+        if z == self.top:
+            self.top = max(self.heights) if self.heights else None
+
+    def gaps(self):
+        """возвращает свободные высоты ниже верхнего блока"""
+        if self.top is None:
+            return []
+        bottom = min(self.heights)
+        return [z for z in range(bottom, self.top) if z not in self.heights]
+
+
 class Mapmanager():
     """ Управление картой """
-    def __init__(self):
+    def __init__(self, chunked=False):
         self.model = 'block' # модель кубика лежит в файле block.egg
         # # используются следующие текстуры: 
         self.texture = 'block.png'          
@@ -11,6 +102,32 @@ class Mapmanager():
             (0.7, 0.2, 0.2, 1),
             (0.5, 0.3, 0.0, 1)
         ] #rgba
+        # индекс блоков: целые координаты (x, y, z) -> NodePath блока
+        self.blocks = {}
+        # столбцы карты: (x, y) -> Column
+        self.columns = {}
+        # режим чанков: блоки рисуются общей геометрией чанка, а не отдельными моделями
+        self.chunked = chunked
+        self.chunks = {}         # (cx, cy) -> Chunk
+        self.dirtyChunks = set() # чанки, которые надо пересобрать
+        self.batch = 0           # пока > 0, чанки пересобираются только в endBatch()
+        self.template = None     # геометрия кубика, разложенная по граням
+        self.blockModel = None   # загруженный один раз кубик с текстурой, его делят все блоки
+        self.loadTask = None     # задача потоковой загрузки loadLandAsync
+        # процедурная карта (loadTerrain):
+        self.terrain = None      # генератор высот Terrain
+        self.terrainTask = None  # задача, которая подгружает чанки вокруг героя
+        self.generated = set()   # чанки, созданные генератором
+        self.edited = set()      # чанки, изменённые игроком, - их нельзя выгружать и создавать заново
+        self.generating = False  # True, пока блоки добавляет не игрок (генератор, подгрузка с диска)
+        # отсечение по дальности (setViewRadius):
+        self.viewRadius = None
+        self.viewFocus = None
+        self.viewTask = None
+        self.detached = OrderedDict() # чанки, отцепленные от сцены, от давно ненужных к недавним
+        self.evicted = {}             # чанки, выгруженные на диск: ключ -> файл
+        self.cacheSize = 16
+        self.evictDir = None
         # создаём основной узел карты:
         self.startNew() 
         # self.addBlock((0,10, 0))
@@ -18,6 +135,18 @@ class Mapmanager():
     def startNew(self):
         """создаёт основу для новой карты""" 
         self.land = render.attachNewNode("Land") # узел, к которому привязаны все блоки карты
+        if self.chunked:
+            if self.template is None:
+                self.template = BlockTemplate(loader.loadModel(self.model))
+            self.land.setTexture(loader.loadTexture(self.texture))
+        elif self.blockModel is None:
+            self.blockModel = loader.loadModel(self.model)
+            self.blockModel.setTexture(loader.loadTexture(self.texture))
+
+    def key(self, pos):
+        """приводит позицию к целым координатам клетки (ключ индекса блоков)"""
+        x, y, z = pos
+        return (int(round(x)), int(round(y)), int(round(z)))
 
     def getColor(self, z):
         if z < len(self.colors):
@@ -26,52 +155,350 @@ class Mapmanager():
             return self.colors[len(self.colors) - 1]
 
     def addBlock(self, position):
-        # создаём строительные блоки 
-        self.block = loader.loadModel(self.model)
-        self.block.setTexture(loader.loadTexture(self.texture)) 
-        self.block.setPos(position)
-        self.color = self.getColor(int(position[2]))
-        self.block.setColor(self.color)
+        # в клетке уже есть блок - второй такой же не нужен
+        key = self.key(position)
+        if key in self.blocks:
+            return self.blocks[key]
+        if self.chunked:
+            # блок попадает в геометрию своего чанка
+            chunk = self.chunks.get(chunkKey(key))
+            if chunk is None:
+                chunk = self.chunks[chunkKey(key)] = Chunk(chunkKey(key), self.land)
+            chunk.blocks.add(key)
+            self.block = chunk.np
+        else:
+            # создаём строительные блоки: свой узел с позицией и цветом,
+            # а геометрия и текстура - общий экземпляр blockModel
+            self.block = self.land.attachNewNode("block")
+            self.block.setPos(position)
+            self.color = self.getColor(int(position[2]))
+            self.block.setColor(self.color)
+
+            self.block.setTag("at", str(key))
+
+            self.blockModel.instanceTo(self.block)
+        self.blocks[key] = self.block
+        x, y, z = key
+        column = self.columns.get((x, y))
+        if column is None:
+            column = self.columns[(x, y)] = Column()
+        column.add(z)
+        if self.chunked:
+            self.touch(key)
+        return self.block
+
+    def touch(self, key):
+        """помечает для пересборки чанк клетки key и соседние чанки, чьи грани она закрывает"""
+        x, y, z = key
+        for dx, dy in ((0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)):
+            self.dirtyChunks.add(chunkKey((x + dx, y + dy)))
+        if self.terrain is not None and not self.generating:
+            self.edited.add(chunkKey(key))
+        if not self.batch:
+            self.flush()
+
+    def flush(self):
+        """пересобирает геометрию изменившихся чанков"""
+        for ckey in self.dirtyChunks:
+            chunk = self.chunks.get(ckey)
+            if chunk is not None:
+                chunk.build(self.template, self.blocks.__contains__, self.getColor)
+        self.dirtyChunks = set()
 
-        self.block.setTag("at", str(position))
+    def beginBatch(self):
+        """начинает массовое изменение карты: чанки не пересобираются после каждого блока"""
+        self.batch += 1
 
-        self.block.reparentTo(self.land)
+    def endBatch(self):
+        self.batch -= 1
+        if not self.batch:
+            self.flush()
 
     def clear(self):
         """обнуляет карту"""
+        if self.loadTask is not None:
+            taskMgr.remove(self.loadTask)
+            self.loadTask = None
+        if self.terrainTask is not None:
+            taskMgr.remove(self.terrainTask)
+            self.terrainTask = None
+        self.terrain = None
+        self.generated = set()
+        self.edited = set()
+        self.detached = OrderedDict()
+        self.evicted = {}
         self.land.removeNode()
+        self.blocks = {}
+        self.columns = {}
+        self.chunks = {}
+        self.dirtyChunks = set()
         self.startNew()
 
+    def unloadChunk(self, ckey):
+        """убирает чанк из памяти: его блоки уходят из индекса и столбцов, узел удаляется"""
+        chunk = self.chunks.pop(ckey, None)
+        if chunk is None:
+            return
+        self.detached.pop(ckey, None)
+        for key in chunk.blocks:
+            del self.blocks[key]
+            self.columns.pop(key[:2], None)
+        chunk.removeNode()
+        # у соседей открылись грани на границе с выгруженным чанком
+        cx, cy = ckey
+        self.dirtyChunks.update(((cx + 1, cy), (cx - 1, cy), (cx, cy + 1), (cx, cy - 1)))
+        if not self.batch:
+            self.flush()
+
     def loadLand(self, filename):
         """создаёт карту земли из текстового файла, возвращает её размеры"""
+        if np is not None:
+            heights, size = self.readHeights(filename)
+            self.clear()
+            self.addBlocks(self.heightsToBlocks(heights))
+            return size
         self.clear()
+        self.beginBatch()
         with open(filename) as file:
             y = 0
             for line in file:
                 x = 0
-                line = line.split(' ')
+                line = line.split()
                 for z in line:
                     for z0 in range(int(z)+1):
                         block = self.addBlock((x, y, z0))
                     x += 1
                 y += 1
+        self.endBatch()
         return x,y
+
+    def readHeights(self, filename):
+        """читает файл высот в двумерный массив NumPy (строка файла - ось y).
+        Короткие строки дополняются высотой -1, то есть клетками без блоков.
+        Возвращает массив и размеры карты, как у loadLand"""
+        with open(filename) as file:
+            lines = file.read().splitlines()
+        lengths = np.array([len(line.split()) for line in lines], dtype=np.intp)
+        values = np.array(" ".join(lines).split(), dtype=np.int16)
+        width = int(lengths.max()) if len(lines) else 0
+        heights = np.full((len(lines), width), -1, dtype=np.int16)
+        heights[np.arange(width) < lengths[:, None]] = values
+        x = int(lengths[-1]) if len(lines) else 0
+        return heights, (x, len(lines))
+
+    def heightsToBlocks(self, heights):
+        """разворачивает массив высот в позиции блоков: в клетке высоты h блоки z = 0..h"""
+        counts = (heights.astype(np.intp) + 1).ravel()
+        counts[counts < 0] = 0
+        cells = np.repeat(np.arange(counts.size), counts)
+        starts = np.cumsum(counts) - counts
+        z = np.arange(cells.size) - starts[cells]
+        y, x = np.divmod(cells, max(heights.shape[1], 1))
+        return zip(x.tolist(), y.tolist(), z.tolist())
+
+    def landSize(self, filename):
+        """размеры карты из файла высот (как у loadLand) без создания блоков"""
+        x, y = 0, 0
+        with open(filename) as file:
+            for line in file:
+                y += 1
+        if y:
+            x = len(line.split())
+        return x, y
+
+    def streamLand(self, filename):
+        """лениво разбирает файл высот по строкам; выдаёт (позиция блока, прочитано байт)"""
+        done = 0
+        with open(filename) as file:
+            y = 0
+            for line in file:
+                done += len(line)
+                x = 0
+                for z in line.split():
+                    for z0 in range(int(z)+1):
+                        yield (x, y, z0), done
+                    x += 1
+                y += 1
+
+    def loadLandAsync(self, filename, onProgress=None, onDone=None, budget=0.005):
+        """как loadLand, но блоки создаются по частям в задаче taskMgr, не дольше budget секунд за кадр.
+        Сразу возвращает размеры карты. onProgress(доля от 0 до 1) вызывается после каждой порции,
+        onDone() - когда карта построена целиком"""
+        self.clear()
+        size = self.landSize(filename)
+        total = max(os.path.getsize(filename), 1)
+        blocks = self.streamLand(filename)
+
+        def load(task):
+            start = globalClock.getRealTime()
+            done = total
+            self.beginBatch()
+            for pos, done in blocks:
+                self.addBlock(pos)
+                if globalClock.getRealTime() - start > budget:
+                    break
+            else:
+                done = total
+                self.loadTask = None
+            self.endBatch()
+            if onProgress is not None:
+                onProgress(min(done / total, 1.0))
+            if self.loadTask is None:
+                if onDone is not None:
+                    onDone()
+                return task.done
+            return task.cont
+
+        self.loadTask = taskMgr.add(load, "loadLand")
+        return size
+
+    def setViewRadius(self, radius, focus=None, cacheSize=16, evictDir=None):
+        """включает отсечение по дальности: чанки дальше radius клеток от узла focus
+        (по умолчанию камера) отцепляются от сцены. Отцепленные чанки остаются в памяти;
+        если задан каталог evictDir, то сверх cacheSize самые давно ненужные сохраняются туда
+        вместе с правками игрока и выгружаются. radius=None выключает отсечение"""
+        if not self.chunked:
+            raise ValueError("отсечение по дальности работает только в режиме чанков (Mapmanager(chunked=True))")
+        if radius is None:
+            for ckey in self.detached:
+                self.chunks[ckey].np.reparentTo(self.land)
+            self.detached = OrderedDict()
+            self.generating = True
+            for path in self.evicted.values():
+                self.addBlocks(readBlocks(path))
+                os.remove(path)
+            self.generating = False
+            self.evicted = {}
+            if self.viewTask is not None:
+                taskMgr.remove(self.viewTask)
+                self.viewTask = None
+            self.viewRadius = None
+            return
+        self.viewRadius = radius
+        self.viewFocus = focus if focus is not None else base.camera
+        self.cacheSize = cacheSize
+        self.evictDir = evictDir
+        if evictDir is not None:
+            os.makedirs(evictDir, exist_ok=True)
+        if self.viewTask is None:
+            self.viewTask = taskMgr.add(self.updateView, "view")
+
+    def inView(self, ckey, pos):
+        """виден ли чанк ckey из точки pos: расстояние считается до центра чанка"""
+        # радиус больше на половину диагонали чанка, чтобы частично видимые чанки не пропадали
+        limit = self.viewRadius + CHUNK_SIZE * 0.71
+        dx = (ckey[0] + 0.5) * CHUNK_SIZE - pos.x
+        dy = (ckey[1] + 0.5) * CHUNK_SIZE - pos.y
+        return dx * dx + dy * dy <= limit * limit
+
+    def updateView(self, task):
+        pos = self.viewFocus.getPos(render)
+        for ckey, chunk in self.chunks.items():
+            visible = self.inView(ckey, pos)
+            if ckey in self.detached:
+                if visible:
+                    del self.detached[ckey]
+                    chunk.np.reparentTo(self.land)
+            elif not visible:
+                chunk.np.detachNode()
+                self.detached[ckey] = True
+        # вернулись к выгруженным чанкам - читаем их с диска
+        for ckey in [ckey for ckey in self.evicted if self.inView(ckey, pos)]:
+            path = self.evicted.pop(ckey)
+            self.generating = True
+            self.addBlocks(readBlocks(path))
+            self.generating = False
+            os.remove(path)
+        if self.evictDir is not None:
+            while len(self.detached) > self.cacheSize:
+                ckey, _ = self.detached.popitem(last=False)
+                self.evictChunk(ckey)
+        return task.cont
+
+    def evictChunk(self, ckey):
+        """сохраняет блоки чанка на диск и выгружает его из памяти"""
+        path = os.path.join(self.evictDir, 'chunk_%d_%d.dat' % ckey)
+        writeBlocks(path, self.chunks[ckey].blocks)
+        self.evicted[ckey] = path
+        self.unloadChunk(ckey)
+
+    def stats(self):
+        """состояние чанков для подбора радиуса обзора; память - грубая оценка в байтах"""
+        geometry = 0
+        for chunk in self.chunks.values():
+            node = chunk.np.node()
+            for i in range(node.getNumGeoms()):
+                geom = node.getGeom(i)
+                vdata = geom.getVertexData()
+                for j in range(vdata.getNumArrays()):
+                    geometry += vdata.getArray(j).getDataSizeBytes()
+                for prim in geom.getPrimitives():
+                    geometry += prim.getDataSizeBytes()
+        return {
+            'resident': len(self.chunks),
+            'attached': len(self.chunks) - len(self.detached),
+            'detached': len(self.detached),
+            'evicted': len(self.evicted),
+            'blocks': len(self.blocks),
+            # ~ запись в словаре блоков, кортеж координат и высота в столбце
+            'memory': geometry + len(self.blocks) * BLOCK_BYTES,
+        }
+
+    def loadTerrain(self, terrain, focus, radius=2, chunksPerFrame=1):
+        """включает бесконечную процедурную карту из генератора terrain (см. terrain.py).
+        Чанки в радиусе radius чанков вокруг узла focus (например, Hero.hero) создаются по мере
+        движения, не больше chunksPerFrame за кадр; дальние чанки выгружаются, кроме изменённых игроком"""
+        if not self.chunked:
+            raise ValueError("процедурная карта работает только в режиме чанков (Mapmanager(chunked=True))")
+        self.clear()
+        self.terrain = terrain
+        self.focus = focus
+        self.radius = radius
+        self.chunksPerFrame = chunksPerFrame
+        self.terrainTask = taskMgr.add(self.updateTerrain, "terrain")
+
+    def updateTerrain(self, task):
+        cx, cy = chunkKey(self.key(self.focus.getPos(render)))
+        # выгружаем чанки дальше radius + 1, чтобы не создавать их заново на каждом шаге у границы
+        for ckey in list(self.generated):
+            if ckey in self.edited:
+                continue
+            if max(abs(ckey[0] - cx), abs(ckey[1] - cy)) > self.radius + 1:
+                self.generated.discard(ckey)
+                self.unloadChunk(ckey)
+        # создаём недостающие чанки, начиная с ближайших
+        missing = []
+        for dx in range(-self.radius, self.radius + 1):
+            for dy in range(-self.radius, self.radius + 1):
+                if (cx + dx, cy + dy) not in self.generated:
+                    missing.append((dx * dx + dy * dy, (cx + dx, cy + dy)))
+        missing.sort()
+        self.generating = True
+        self.beginBatch()
+        for distance, ckey in missing[:self.chunksPerFrame]:
+            self.addBlocks(self.terrain.chunkBlocks(ckey))
+            self.generated.add(ckey)
+        self.endBatch()
+        self.generating = False
+        return task.cont
     
     def findBlocks(self, pos):
-        return self.land.findAllMatches("=at=" + str(pos))
+        """возвращает список блоков в клетке pos (пустой или из одного блока)"""
+        block = self.blocks.get(self.key(pos))
+        if block is None:
+            return []
+        return [block]
 
     def isEmpty(self, pos):
-        blocks = self.findBlocks(pos)
-        if blocks:
-            return False
-        else:
-            return True
+        return self.key(pos) not in self.blocks
 
     def findHighestEmpty(self, pos):
         x, y, z = pos
-        z = 1
-        while not self.isEmpty((x, y, z)):
-            z += 1
+        column = self.columns.get((int(round(x)), int(round(y))))
+        if column is None:
+            z = 1
+        else:
+            z = column.free
         return (x, y, z)
 
     def buildBlock(self, pos):
@@ -83,48 +510,81 @@ class Mapmanager():
 
     def delBlock(self, position):
         """удаляет блоки в указанной позиции ва"""
-        blocks = self.findBlocks(position)
-        for block in blocks:
-            block.removeNode()
+        key = self.key(position)
+        block = self.blocks.pop(key, None)
+        if block is not None:
+            x, y, z = key
+            column = self.columns[(x, y)]
+            column.remove(z)
+            if column.top is None:
+                del self.columns[(x, y)]
+            if self.chunked:
+                chunk = self.chunks[chunkKey(key)]
+                chunk.blocks.discard(key)
+                if not chunk.blocks:
+                    chunk.removeNode()
+                    del self.chunks[chunk.key]
+                self.touch(key)
+            else:
+                block.removeNode()
+
+    def checkConsistency(self):
+        """сверяет индекс блоков, столбцы и узел Land; возвращает список найденных расхождений"""
+        problems = []
+        if self.chunked:
+            inChunks = sum(len(chunk.blocks) for chunk in self.chunks.values())
+            if inChunks != len(self.blocks):
+                problems.append("в чанках %d блоков, в индексе %d" % (inChunks, len(self.blocks)))
+            if self.land.getNumChildren() + len(self.detached) != len(self.chunks):
+                problems.append("в Land %d узлов и %d отцеплено, чанков %d" % (self.land.getNumChildren(), len(self.detached), len(self.chunks)))
+        elif self.land.getNumChildren() != len(self.blocks):
+            problems.append("в Land %d узлов, в индексе %d блоков" % (self.land.getNumChildren(), len(self.blocks)))
+        heights = {}
+        for x, y, z in self.blocks:
+            heights.setdefault((x, y), set()).add(z)
+        if set(heights) != set(self.columns):
+            problems.append("столбцы не совпадают с индексом блоков")
+        for xy, column in self.columns.items():
+            zs = heights.get(xy, set())
+            if column.heights != zs:
+                problems.append("столбец %s: высоты %s, а в индексе %s" % (xy, sorted(column.heights), sorted(zs)))
+                continue
+            if column.top != max(zs):
+                problems.append("столбец %s: top=%s, ожидалось %s" % (xy, column.top, max(zs)))
+            free = 1
+            while free in zs:
+                free += 1
+            if column.free != free:
+                problems.append("столбец %s: free=%s, ожидалось %s" % (xy, column.free, free))
+        return problems
 
     def delBlockFrom(self, position):
         x, y, z = self.findHighestEmpty(position)
         pos = x, y, z - 1
-        for block in self.findBlocks(pos):
-                block.removeNode()
-
-    def saveMap(self):
-        """сохраняет все блоки, включая постройки, в бинарный файл"""
-
-        """возвращает коллекцию NodePath для всех существующих в карте мира блоков""" 
-        blocks = self.land.getChildren()
-        # открываем бинарный файл на запись
-        with open('my_map.dat', 'wb') as fout:
+        self.delBlock(pos)
 
-            # сохраняем в начало файла количество блоков
-            pickle.dump(len(blocks), fout)
+    def saveMap(self, filename='my_map.dat'):
+        """сохраняет все блоки, включая постройки и выгруженные на диск чанки, в бинарный файл"""
+        writeBlocks(filename, self.allBlocks())
 
-            # обходим все блоки
-            for block in blocks:
-                # сохраняем позицию
-                x, y, z = block.getPos()
-                pos = (int(x), int(y), int(z))
-                pickle.dump(pos, fout)
-
-    def loadMap(self):
+    def loadMap(self, filename='my_map.dat'):
+        """загружает карту из файла saveMap; старые файлы с pickle на каждый блок тоже читаются"""
         # удаляем все блоки
         self.clear()
+        self.addBlocks(readBlocks(filename))
 
-        # открываем бинарный файл на чтение
-        with open('my_map.dat', 'rb') as fin:
-            
-            # считываем количество блоков
-            length = pickle.load(fin)
-
-            for i in range(lenght):
-                # считываем позицию
-                pos = pickle.load(fin)
-
-                # создаём новый блок
-                self.addBlock(pos)
+    def allBlocks(self):
+        """позиции всех блоков карты: из памяти и из выгруженных на диск чанков"""
+        for pos in self.blocks:
+            yield pos
+        for path in self.evicted.values():
+            for pos in readBlocks(path):
+                if pos not in self.blocks:
+                    yield pos
 
+    def addBlocks(self, positions):
+        """массово добавляет блоки; чанки пересобираются один раз в конце"""
+        self.beginBatch()
+        for pos in positions:
+            self.addBlock(pos)
+        self.endBatch()
@@ -0,0 +1,53 @@
+import math
+
+from chunks import CHUNK_SIZE
+
+
+class Terrain():
+    """ Процедурная карта высот: value noise из нескольких октав, одна и та же для одного seed """
+    def __init__(self, seed=0, scale=24.0, octaves=3, maxHeight=6):
+        self.seed = seed
+        self.scale = scale         # размер самой крупной "волны" в клетках
+        self.octaves = octaves     # сколько слоёв шума складывается
+        self.maxHeight = maxHeight # самая большая высота столбца
+
+    def lattice(self, ix, iy, octave):
+        """псевдослучайное число 0..1 в узле целочисленной решётки"""
+        n = (ix * 374761393 + iy * 668265263 + (self.seed + octave * 1013) * 2246822519) & 0xffffffff
+        n = ((n ^ (n >> 13)) * 1274126177) & 0xffffffff
+        return (n ^ (n >> 16)) / 0xffffffff
+
+    def noise(self, x, y, octave):
+        """гладкий шум в точке: плавная интерполяция между соседними узлами решётки"""
+        ix, iy = math.floor(x), math.floor(y)
+        fx, fy = x - ix, y - iy
+        sx = fx * fx * (3 - 2 * fx)
+        sy = fy * fy * (3 - 2 * fy)
+        a = self.lattice(ix, iy, octave)
+        b = self.lattice(ix + 1, iy, octave)
+        c = self.lattice(ix, iy + 1, octave)
+        d = self.lattice(ix + 1, iy + 1, octave)
+        top = a + (b - a) * sx
+        bottom = c + (d - c) * sx
+        return top + (bottom - top) * sy
+
+    def height(self, x, y):
+        """высота столбца (x, y): верхний блок стоит на этом z"""
+        total = 0.0
+        weight = 1.0
+        weights = 0.0
+        frequency = 1.0 / self.scale
+        for octave in range(self.octaves):
+            total += self.noise(x * frequency, y * frequency, octave) * weight
+            weights += weight
+            weight *= 0.5
+            frequency *= 2
+        return int(total / weights * (self.maxHeight + 1))
+
+    def chunkBlocks(self, ckey):
+        """выдаёт позиции всех блоков чанка ckey: в столбце высоты h блоки z = 0..h"""
+        cx, cy = ckey
+        for x in range(cx * CHUNK_SIZE, (cx + 1) * CHUNK_SIZE):
+            for y in range(cy * CHUNK_SIZE, (cy + 1) * CHUNK_SIZE):
+                for z in range(self.height(x, y) + 1):
+                    yield (x, y, z)
@@ -1,16 +1,38 @@
 from direct.showbase.ShowBase import ShowBase
 from panda3d.core import (
     AmbientLight, PointLight, Vec4, Material, TransparencyAttrib,
-    Geom, GeomNode, GeomLines, GeomTriangles,
-    GeomVertexFormat, GeomVertexData, GeomVertexWriter, TextNode
+    Geom, GeomNode, GeomLines, GeomTriangles, GeomPoints,
+    GeomVertexFormat, GeomVertexData, GeomVertexWriter, TextNode,
+    Shader, Texture, GeomEnums, BoundingSphere, Point3, PNMImage, PNMImageHeader, SamplerState,
+    CardMaker, NodePath
 )
 from direct.gui.OnscreenText import OnscreenText
 from direct.gui.OnscreenImage import OnscreenImage
 from direct.gui.DirectGui import DirectFrame
+import glob
+import hashlib
 import math
+import os
+import queue
 import random
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # без NumPy режим "points" недоступний
+    np = None
 
 SCALE_FACTOR = 0.5  # глобальний масштаб
+SCRUB_STEP = 10.0   # одне натискання , / . зсуває шкалу часу на SCRUB_STEP * прискорення симульованих секунд
+
+# Кеш текстур: зменшені копії з mip-рівнями у форматі Panda (.txo), ключ - хеш вмісту джерела
+TEXTURE_CACHE_DIR = "texture_cache"
+HIGH_TEXTURE_SIZE = 2048  # більша сторона текстури тіла у фокусі камери
+LOW_TEXTURE_SIZE = 128    # ... решти тіл (і на старті)
+PLACEHOLDER_COLOR = (0.45, 0.45, 0.5, 1)  # колір тіла, поки його текстура ще вантажиться
 
 # =========================
 # Візуалізація орбіти (біле кільце)
@@ -71,6 +93,224 @@ def make_ring_node(name: str, inner_r: float, outer_r: float, segments: int = 18
     node.addGeom(geom)
     return node
 
+# =========================
+# Кеш текстур (LOD)
+# =========================
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def cached_texture_path(source: str, size: int, digest: str, cache_dir: str = TEXTURE_CACHE_DIR) -> str:
+    # Змінився файл - змінився хеш, тож стара копія в кеші просто не використовується
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(cache_dir, f"{stem}-{digest[:16]}-{size}.txo")
+
+
+def build_cached_texture(source: str, size: int, target: str) -> Texture:
+    # Джерело, зменшене так, щоб більша сторона була не більше size (сторони - степені двійки),
+    # з готовими mip-рівнями, стиснене в DXT1 (DXT5 з альфою)
+    header = PNMImageHeader()
+    header.readHeader(source)
+    scale = min(1.0, size / max(header.getXSize(), header.getYSize()))
+    width = 1 << max(0, int(header.getXSize() * scale).bit_length() - 1)
+    height = 1 << max(0, int(header.getYSize() * scale).bit_length() - 1)
+    # зменшення одразу під час декодування (для JPEG - у libjpeg), без повного зображення в пам'яті
+    image = PNMImage()
+    image.setReadSize(width, height)
+    image.read(source)
+
+    tex = Texture(os.path.basename(source))
+    tex.load(image)
+    tex.setMinfilter(SamplerState.FT_linear_mipmap_linear)
+    tex.setMagfilter(SamplerState.FT_linear)
+    tex.setCompression(Texture.CM_on)
+    tex.generateRamMipmapImages()
+    # без libsquish у збірці Panda3D лишиться нестиснений (тоді стисне драйвер при завантаженні)
+    tex.compressRamImage(Texture.CM_dxt5 if image.hasAlpha() else Texture.CM_dxt1, Texture.QL_default, None)
+
+    # Атомарно: пишемо у свій тимчасовий файл і підміняємо ним target - обірваний запис
+    # чи кілька одночасних записів не лишать у кеші пошкодженого .txo
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f"{target[:-len('.txo')]}.{os.getpid()}-{threading.get_ident()}.tmp.txo"
+    if not tex.write(tmp):
+        raise OSError(f"не вдалося записати {tmp}")
+    os.replace(tmp, target)
+    return tex
+
+
+def build_texture_cache(sources, cache_dir: str = TEXTURE_CACHE_DIR):
+    # Попередня підготовка (python f.py --build-textures): обидві копії кожної текстури
+    for source in sources:
+        digest = file_digest(source)
+        for size in (LOW_TEXTURE_SIZE, HIGH_TEXTURE_SIZE):
+            target = cached_texture_path(source, size, digest, cache_dir)
+            if not os.path.exists(target):
+                build_cached_texture(source, size, target)
+                print(f"{source} -> {target}")
+
+
+class TextureLibrary:
+    """Текстури тіл з кешу: low - маленька копія (старт, далекі тіла), high - детальна,
+    лише для тіла у фокусі камери. Відсутню в кеші копію створює при першому запиті.
+    apply() вантажить у фонових потоках; готові текстури чіпляє до вузлів poll() у головному потоці."""
+    def __init__(self, loader, cache_dir: str = TEXTURE_CACHE_DIR, workers: int = 4):
+        self.loader = loader
+        self.cache_dir = cache_dir
+        self.digests = {}  # файл -> хеш вмісту (рахуємо один раз за запуск)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="textures")
+        self.loading = {}  # (файл, розмір) -> Future, щоб одна текстура не вантажилась двічі
+        self.waiting = {}  # (файл, розмір) -> [callback, ...]
+        self.arrived = queue.Queue()  # (файл, розмір) готових Future - з фонових потоків
+
+    def get(self, source: str, size: int) -> Texture:
+        digest = self.digests.get(source)
+        if digest is None:
+            digest = self.digests[source] = file_digest(source)
+        path = cached_texture_path(source, size, digest, self.cache_dir)
+        if os.path.exists(path):
+            tex = self.loader.loadTexture(path, okMissing=True)
+            if tex is not None:
+                return tex
+            # пошкоджений файл у кеші - збираємо заново
+        return build_cached_texture(source, size, path)
+
+    def low(self, source: str) -> Texture:
+        return self.get(source, LOW_TEXTURE_SIZE)
+
+    def high(self, source: str) -> Texture:
+        return self.get(source, HIGH_TEXTURE_SIZE)
+
+    def load_async(self, source: str, size: int, callback):
+        # callback(texture) буде викликано з poll(), тобто в головному потоці
+        key = (source, size)
+        self.waiting.setdefault(key, []).append(callback)
+        if key not in self.loading:
+            future = self.pool.submit(self.get, source, size)
+            self.loading[key] = future
+            future.add_done_callback(lambda f: self.arrived.put(key))
+
+    def apply(self, nodepath, source: str, size: int, placeholder=None):
+        # Текстура на nodepath, щойно буде готова; до того - однотонний placeholder (якщо задано)
+        # або попередня текстура. Пізніший запит для того самого вузла скасовує ранній
+        wanted = (source, size)
+        nodepath.setPythonTag("texture", wanted)
+        if placeholder:
+            nodepath.setTextureOff(1)
+            nodepath.setColor(placeholder)
+            nodepath.setPythonTag("placeholder", True)
+
+        def attach(tex):
+            if nodepath.isEmpty() or nodepath.getPythonTag("texture") != wanted:
+                return
+            nodepath.setTexture(tex, 1)
+            # placeholder міг поставити і ранній, вже скасований запит - прибирає той, хто першим наклав текстуру
+            if nodepath.getPythonTag("placeholder"):
+                nodepath.clearColor()
+                nodepath.clearPythonTag("placeholder")
+
+        self.load_async(source, size, attach)
+
+    def pending(self) -> int:
+        return len(self.loading)
+
+    def poll(self):
+        # Щокадру: чіпляємо все, що довантажилось
+        while True:
+            try:
+                key = self.arrived.get_nowait()
+            except queue.Empty:
+                return
+            future = self.loading.pop(key)
+            callbacks = self.waiting.pop(key, [])
+            try:
+                tex = future.result()
+            except Exception as e:  # лишається placeholder
+                print(f"Не вдалося завантажити текстуру {key[0]}: {e}")
+                continue
+            for callback in callbacks:
+                callback(tex)
+
+# =========================
+# Годинник симуляції
+# =========================
+class SimulationClock:
+    """Симульований час у секундах. Кути всіх тіл рахуються з нього в замкненій формі
+    (кут = швидкість * час), тож похибка не накопичується, а перехід на будь-який момент - O(1)."""
+    def __init__(self, time_factor: float = 1.0):
+        self.time = 0.0
+        self.time_factor = time_factor
+        self.paused = False
+
+    def advance(self, dt: float) -> float:
+        # Щокадру: реальний dt з урахуванням прискорення
+        if not self.paused:
+            self.time += dt * self.time_factor
+        return self.time
+
+    def seek(self, t: float) -> float:
+        # Перейти на момент t
+        self.time = t
+        return self.time
+
+    def scrub(self, delta: float) -> float:
+        # Зсунутися по шкалі часу на delta симульованих секунд (назад - від'ємне)
+        return self.seek(self.time + delta)
+
+# =========================
+# Низькополігональна "каменюка" (ікосфера) з UV
+# =========================
+def make_rock_node(name: str, subdivisions: int = 1) -> GeomNode:
+    # Ікосаедр, кожна грань ділиться на 4 subdivisions разів: 1 -> 80 трикутників
+    # (модель smiley - 1280; для астероїда в кілька пікселів це зайве)
+    t = (1.0 + math.sqrt(5.0)) / 2.0
+    points = [(-1, t, 0), (1, t, 0), (-1, -t, 0), (1, -t, 0),
+              (0, -1, t), (0, 1, t), (0, -1, -t), (0, 1, -t),
+              (t, 0, -1), (t, 0, 1), (-t, 0, -1), (-t, 0, 1)]
+    faces = [(0, 11, 5), (0, 5, 1), (0, 1, 7), (0, 7, 10), (0, 10, 11),
+             (1, 5, 9), (5, 11, 4), (11, 10, 2), (10, 7, 6), (7, 1, 8),
+             (3, 9, 4), (3, 4, 2), (3, 2, 6), (3, 6, 8), (3, 8, 9),
+             (4, 9, 5), (2, 4, 11), (6, 2, 10), (8, 6, 7), (9, 8, 1)]
+    points = [tuple(c / math.sqrt(sum(v * v for v in p)) for c in p) for p in points]
+
+    for _ in range(subdivisions):
+        middles = {}
+
+        def middle(a, b):
+            key = (min(a, b), max(a, b))
+            if key not in middles:
+                m = [(points[a][i] + points[b][i]) / 2 for i in range(3)]
+                length = math.sqrt(sum(v * v for v in m))
+                points.append(tuple(v / length for v in m))
+                middles[key] = len(points) - 1
+            return middles[key]
+
+        new_faces = []
+        for a, b, c in faces:
+            ab, bc, ca = middle(a, b), middle(b, c), middle(c, a)
+            new_faces += [(a, ab, ca), (b, bc, ab), (c, ca, bc), (ab, bc, ca)]
+        faces = new_faces
+
+    fmt = GeomVertexFormat.getV3n3t2()
+    vdata = GeomVertexData(name, fmt, Geom.UHStatic)
+    v_writer = GeomVertexWriter(vdata, 'vertex')
+    n_writer = GeomVertexWriter(vdata, 'normal')
+    t_writer = GeomVertexWriter(vdata, 'texcoord')
+    for x, y, z in points:
+        v_writer.addData3(x, y, z)
+        n_writer.addData3(x, y, z)
+        t_writer.addData2f(0.5 + math.atan2(y, x) / (2 * math.pi), 0.5 + math.asin(z) / math.pi)
+
+    tris = GeomTriangles(Geom.UHStatic)
+    for a, b, c in faces:
+        tris.addVertices(a, b, c)
+
+    geom = Geom(vdata)
+    geom.addPrimitive(tris)
+    node = GeomNode(name)
+    node.addGeom(geom)
+    return node
+
 # =========================
 # Планета
 # =========================
@@ -96,9 +336,9 @@ class Planet:
         self.model.setScale(radius * SCALE_FACTOR)
 
         self.texture_file = texture
+        self.rings = []  # (NodePath кільця, файл текстури)
         if texture:
-            tex = base.loader.loadTexture(texture)
-            self.model.setTexture(tex, 1)
+            base.textures.apply(self.model, texture, LOW_TEXTURE_SIZE, placeholder=PLACEHOLDER_COLOR)
 
         self.model.setP(tilt)
         self.moons = []
@@ -110,11 +350,21 @@ class Planet:
     def add_moon(self, moon):
         self.moons.append(moon)
 
-    def update(self, dt, time_factor):
-        self.pivot.setH(self.pivot.getH() + self.angular_speed * dt * time_factor)
-        self.model.setH(self.model.getH() + self.spin_speed * dt * time_factor)
+    def set_detail(self, high: bool):
+        # Детальна текстура - лише поки камера на цій планеті (до її приходу видно маленьку)
+        textures = self.base.textures
+        size = HIGH_TEXTURE_SIZE if high else LOW_TEXTURE_SIZE
+        if self.texture_file:
+            textures.apply(self.model, self.texture_file, size)
+        for ring_np, ring_file in self.rings:
+            textures.apply(ring_np, ring_file, size)
+
+    def update(self, t):
+        # Положення на момент t симульованого часу
+        self.pivot.setH(self.angular_speed * t % 360.0)
+        self.model.setH(self.spin_speed * t % 360.0)
         for m in self.moons:
-            m.update(dt, time_factor)
+            m.update(t)
 
 # =========================
 # Супутник
@@ -137,23 +387,164 @@ class Moon:
         self.model.setScale(radius * SCALE_FACTOR)
         self.texture_file = texture
         if texture:
-            tex = base.loader.loadTexture(texture)
-            self.model.setTexture(tex, 1)
+            base.textures.apply(self.model, texture, LOW_TEXTURE_SIZE, placeholder=PLACEHOLDER_COLOR)
+
+    def set_detail(self, high: bool):
+        if self.texture_file:
+            size = HIGH_TEXTURE_SIZE if high else LOW_TEXTURE_SIZE
+            self.base.textures.apply(self.model, self.texture_file, size)
 
-    def update(self, dt, time_factor):
-        self.pivot.setH(self.pivot.getH() + self.angular_speed * dt * time_factor)
-        self.model.setH(self.model.getH() + self.spin_speed * dt * time_factor)
+    def update(self, t):
+        self.pivot.setH(self.angular_speed * t % 360.0)
+        self.model.setH(self.spin_speed * t % 360.0)
 
 # =========================
 # Пояс астероїдів
 # =========================
+# Інстансинг: одна геометрія малюється count разів; параметри i-го астероїда - у буферній текстурі
+# (2 текселі: орбіта (радіус, початковий кут, швидкість рад/с, z) і форма (sx, sy, sz, поворот)),
+# позицію на орбіті рахує вершинний шейдер з єдиного uniform belt_time.
+# Uniform - float32: при t ~ 1e9 його крок ~64 с. Тому швидкості квантуються так, що за BELT_PERIOD
+# кожен астероїд робить цілу кількість обертів, а в шейдер іде t % BELT_PERIOD (рахується в float64)
+BELT_PERIOD = 80000.0
+BELT_VERTEX_SHADER = """
+#version 140
+uniform mat4 p3d_ModelViewProjectionMatrix;
+uniform samplerBuffer belt_data;
+uniform float belt_time;
+in vec4 p3d_Vertex;
+in vec3 p3d_Normal;
+in vec2 p3d_MultiTexCoord0;
+out vec2 texcoord;
+out float light;
+
+void main() {
+    vec4 orbit = texelFetch(belt_data, gl_InstanceID * 2);
+    vec4 shape = texelFetch(belt_data, gl_InstanceID * 2 + 1);
+    float ang = orbit.y + orbit.z * belt_time;
+    vec3 center = vec3(orbit.x * cos(ang), orbit.x * sin(ang), orbit.w);
+    float c = cos(shape.w);
+    float s = sin(shape.w);
+    mat3 rot = mat3(c, s, 0.0, -s, c, 0.0, 0.0, 0.0, 1.0);
+    vec3 pos = center + rot * (p3d_Vertex.xyz * shape.xyz);
+    gl_Position = p3d_ModelViewProjectionMatrix * vec4(pos, 1.0);
+    texcoord = p3d_MultiTexCoord0;
+    // Сонце - у початку координат
+    vec3 normal = normalize(rot * (p3d_Normal / shape.xyz));
+    light = 0.15 + max(dot(normal, normalize(-pos)), 0.0);
+}
+"""
+
+BELT_FRAGMENT_SHADER = """
+#version 140
+uniform sampler2D p3d_Texture0;
+in vec2 texcoord;
+in float light;
+out vec4 p3d_FragColor;
+
+void main() {
+    vec4 color = texture(p3d_Texture0, texcoord);
+    p3d_FragColor = vec4(color.rgb * light, color.a);
+}
+"""
+
+
+def supports_instancing(base) -> bool:
+    gsg = base.win.getGsg() if base.win else None
+    return bool(gsg and gsg.getSupportsGlsl() and gsg.getSupportsBufferTexture()
+                and gsg.getSupportsGeometryInstancing())
+
+
 class AsteroidBelt:
-    def __init__(self, base, inner_radius=30, outer_radius=38, count=400):
+    """mode="instanced" - весь пояс одним викликом малювання, рух рахує шейдер;
+    mode="points" - без шейдерів: позиції рахує NumPy одним масивом і пише в одну геометрію точок;
+    mode="nodes" - окремий NodePath на астероїд, позиції рахуються на Python щокадру.
+    Без mode - instanced, якщо відеокарта його підтримує, інакше points (якщо є NumPy)."""
+    def __init__(self, base, inner_radius=30, outer_radius=38, count=400, mode=None):
         self.base = base
         self.asteroids = []
-        self.asteroid_tex = base.loader.loadTexture("asteroid.jpg")
         self.root = base.render.attachNewNode("asteroid-belt")
+        self.time = 0.0
+
+        if mode is None:
+            if supports_instancing(base):
+                mode = "instanced"
+            else:
+                mode = "points" if np is not None else "nodes"
+        self.mode = mode
+        if mode == "instanced":
+            self.create_instanced(inner_radius, outer_radius, count)
+        elif mode == "points":
+            self.create_points(inner_radius, outer_radius, count)
+        else:
+            self.create_nodes(inner_radius, outer_radius, count)
+        if mode != "points":
+            # текстура на корені (з пріоритетом) діє на всі астероїди
+            base.textures.apply(self.root, "asteroid.jpg", LOW_TEXTURE_SIZE)
 
+    def create_instanced(self, inner_radius, outer_radius, count):
+        data = array("f")
+        for i in range(count):
+            r = random.uniform(inner_radius, outer_radius) * SCALE_FACTOR
+            data.extend((r, random.uniform(0, 2 * math.pi),
+                         2 * math.pi * round(BELT_PERIOD / random.uniform(200, 400)) / BELT_PERIOD,
+                         random.uniform(-0.3, 0.3)))
+            data.extend((random.uniform(0.05, 0.15) * SCALE_FACTOR,
+                         random.uniform(0.05, 0.15) * SCALE_FACTOR,
+                         random.uniform(0.05, 0.15) * SCALE_FACTOR,
+                         random.uniform(0, 2 * math.pi)))
+
+        self.belt_data = Texture("asteroid-belt-data")
+        self.belt_data.setupBufferTexture(count * 2, Texture.T_float, Texture.F_rgba32, GeomEnums.UH_static)
+        self.belt_data.setRamImage(data.tobytes())
+
+        model = self.root.attachNewNode(make_rock_node("asteroid"))
+        model.setInstanceCount(count)
+        # межі однієї моделі не охоплюють пояс - задаємо їх вручну, щоб пояс не відсікався
+        model.node().setBounds(BoundingSphere(Point3(0, 0, 0), outer_radius * SCALE_FACTOR + 1))
+        model.node().setFinal(True)
+
+        self.root.setShader(Shader.make(Shader.SL_GLSL, BELT_VERTEX_SHADER, BELT_FRAGMENT_SHADER))
+        self.root.setShaderInput("belt_data", self.belt_data)
+        self.root.setShaderInput("belt_time", self.time % BELT_PERIOD)
+
+    def create_points(self, inner_radius, outer_radius, count):
+        # Орбіти - масиви NumPy; кожен астероїд - точка в одній динамічній GeomVertexData
+        rng = np.random.default_rng(random.getrandbits(32))
+        self.radius = rng.uniform(inner_radius, outer_radius, count) * SCALE_FACTOR
+        self.start_angle = rng.uniform(0, 2 * np.pi, count)
+        self.angle = self.start_angle.copy()
+        self.speed = np.radians(360.0 / rng.uniform(200, 400, count))
+        self.positions = np.empty((count, 3), np.float32)
+        self.positions[:, 2] = rng.uniform(-0.3, 0.3, count)
+        self.cos = np.empty(count)
+        self.sin = np.empty(count)
+
+        self.vdata = GeomVertexData("asteroid-belt", GeomVertexFormat.getV3(), Geom.UHDynamic)
+        self.vdata.uncleanSetNumRows(count)
+        points = GeomPoints(Geom.UHStatic)
+        points.addNextVertices(count)
+        geom = Geom(self.vdata)
+        geom.addPrimitive(points)
+        node = GeomNode("asteroid-points")
+        node.addGeom(geom)
+
+        model = self.root.attachNewNode(node)
+        model.setRenderModeThickness(2)
+        model.setColor(0.55, 0.5, 0.45, 1)
+        model.setLightOff()  # у точок немає нормалей
+        self.write_points()
+
+    def write_points(self):
+        np.cos(self.angle, out=self.cos)
+        np.sin(self.angle, out=self.sin)
+        np.multiply(self.radius, self.cos, out=self.positions[:, 0], casting="unsafe")
+        np.multiply(self.radius, self.sin, out=self.positions[:, 1], casting="unsafe")
+        # усі позиції одним копіюванням у буфер вершин
+        memoryview(self.vdata.modifyArray(0)).cast("B")[:] = memoryview(self.positions).cast("B")
+
+    def create_nodes(self, inner_radius, outer_radius, count):
+        base = self.base
         for i in range(count):
             r = random.uniform(inner_radius, outer_radius) * SCALE_FACTOR
             ang = random.uniform(0, 2 * math.pi)
@@ -173,29 +564,45 @@ class AsteroidBelt:
                          random.uniform(0, 360))
 
             model.setPos(x, y, random.uniform(-0.3, 0.3))
-            model.setTexture(self.asteroid_tex, 1)
 
             orbit_speed = 360.0 / random.uniform(200, 400)
             self.asteroids.append((model, r, ang, orbit_speed))
 
-    def update(self, dt, time_factor):
-        for i, (model, r, ang, speed) in enumerate(self.asteroids):
-            ang += speed * dt * (math.pi / 180.0) * time_factor
+    def update(self, t):
+        # Положення на момент t симульованого часу: кут = початковий + швидкість * t
+        self.time = t
+        if self.mode == "instanced":
+            self.root.setShaderInput("belt_time", t % BELT_PERIOD)
+            return
+        if self.mode == "points":
+            np.multiply(self.speed, t, out=self.angle)
+            self.angle += self.start_angle
+            self.write_points()
+            return
+
+        for model, r, ang, speed in self.asteroids:
+            ang += speed * t * (math.pi / 180.0)
             x = r * math.cos(ang)
             y = r * math.sin(ang)
             model.setPos(x, y, model.getZ())
-            self.asteroids[i] = (model, r, ang, speed)
 
 # =========================
 # Головний застосунок
 # =========================
 class SolarSystemApp(ShowBase):
-    def __init__(self):
+    def __init__(self, asteroid_count=400):
+        # Час до першого кадру і до приходу всіх текстур (рахуємо від створення застосунку)
+        self.start_time = time.perf_counter()
+        self.first_frame_time = None
+        self.textures_ready_time = None
         super().__init__()
 
         self.setBackgroundColor(0, 0, 0)
         self.disableMouse()  # власне керування камерою
 
+        # Текстури тіл: спершу маленькі копії, детальні - при фокусі камери
+        self.textures = TextureLibrary(self.loader)
+
         # Шрифт
         self.font = self.loader.loadFont("DejaVuSans.ttf")
         TextNode.setDefaultFont(self.font)
@@ -215,8 +622,7 @@ class SolarSystemApp(ShowBase):
         self.sun = self.loader.loadModel("models/smiley")
         self.sun.setScale(6.0 * SCALE_FACTOR)
         self.sun.setPos(0, 0, 0)
-        sun_tex = self.loader.loadTexture("sun.jpg")
-        self.sun.setTexture(sun_tex, 1)
+        self.textures.apply(self.sun, "sun.jpg", HIGH_TEXTURE_SIZE, placeholder=(1.0, 0.8, 0.2, 1))
         self.sun_mat = Material()
         self.sun_mat.setEmission((1.0, 1.0, 0.0, 1.0))
         self.sun.setMaterial(self.sun_mat)
@@ -230,11 +636,9 @@ class SolarSystemApp(ShowBase):
         self.sky.setTwoSided(True)
         self.sky.setLightOff()
         self.sky.setShaderOff()
-        sky_tex = self.loader.loadTexture("stars.jpg")
-        self.sky.setTexture(sky_tex, 1)
+        self.textures.apply(self.sky, "stars.jpg", HIGH_TEXTURE_SIZE, placeholder=(0, 0, 0, 1))
 
         # Ефекти сонця
-        self.pulse_time = 0.0
         self.pulse_speed = 0.3
         self.pulse_strength = 0.3
         self.sun_spin_speed = 6.0
@@ -287,7 +691,7 @@ class SolarSystemApp(ShowBase):
         self.add_textured_rings()
 
         # Пояс астероїдів
-        self.asteroid_belt = AsteroidBelt(self, inner_radius=30, outer_radius=38, count=400)
+        self.asteroid_belt = AsteroidBelt(self, inner_radius=30, outer_radius=38, count=asteroid_count)
 
         # Швидкий доступ
         self.planet_dict = {p.name: p for p in self.planets}
@@ -329,7 +733,7 @@ class SolarSystemApp(ShowBase):
         self.weight_frame = None
 
         # Час
-        self.time_factor = 1.0
+        self.clock = SimulationClock()
         self.time_text = OnscreenText(
             text="Час: x1.00",
             pos=(1.15, 0.95), scale=0.05, fg=(1,1,1,1), align=TextNode.ARight, mayChange=True, font=self.font
@@ -355,6 +759,10 @@ class SolarSystemApp(ShowBase):
         self.accept("-", self.slow_down)
         self.accept("=", self.reset_time)
         self.accept("r", self.reset_time)
+        # Шкала часу: пауза, прокрутка назад/вперед
+        self.accept("space", self.toggle_pause)
+        self.accept(",", lambda: self.scrub_time(-SCRUB_STEP))
+        self.accept(".", lambda: self.scrub_time(SCRUB_STEP))
 
         # Регулювання маси людини
         self.accept("[", self.decrease_mass)
@@ -401,6 +809,9 @@ class SolarSystemApp(ShowBase):
 
         # Оновлення
         self.taskMgr.add(self.update_task, "update-orbits")
+        # Текстури, що довантажились у фоні; час першого кадру - після рендеру (igLoop має sort 50)
+        self.taskMgr.add(self.texture_task, "texture-arrivals")
+        self.taskMgr.add(self.first_frame_task, "first-frame", sort=55)
 
     # ==== МИША ====
     def start_rotate(self):
@@ -469,7 +880,8 @@ class SolarSystemApp(ShowBase):
             s_np = saturn.model.attachNewNode(s_ring_node)
             s_np.setTransparency(TransparencyAttrib.MAlpha)
             s_np.setTwoSided(True)
-            s_np.setTexture(self.loader.loadTexture("saturn_ring.jpg"), 1)
+            self.textures.apply(s_np, "saturn_ring.jpg", LOW_TEXTURE_SIZE, placeholder=PLACEHOLDER_COLOR)
+            saturn.rings.append((s_np, "saturn_ring.jpg"))
 
         uranus = self._get("Уран")
         if uranus:
@@ -478,7 +890,8 @@ class SolarSystemApp(ShowBase):
             u_np = uranus.model.attachNewNode(u_ring_node)
             u_np.setTransparency(TransparencyAttrib.MAlpha)
             u_np.setTwoSided(True)
-            u_np.setTexture(self.loader.loadTexture("uran_ring.png"), 1)
+            self.textures.apply(u_np, "uran_ring.png", LOW_TEXTURE_SIZE, placeholder=PLACEHOLDER_COLOR)
+            uranus.rings.append((u_np, "uran_ring.png"))
 
         neptune = self._get("Нептун")
         if neptune:
@@ -487,7 +900,8 @@ class SolarSystemApp(ShowBase):
             n_np = neptune.model.attachNewNode(n_ring_node)
             n_np.setTransparency(TransparencyAttrib.MAlpha)
             n_np.setTwoSided(True)
-            n_np.setTexture(self.loader.loadTexture("neptun_ring.jpg"), 1)
+            self.textures.apply(n_np, "neptun_ring.jpg", LOW_TEXTURE_SIZE, placeholder=PLACEHOLDER_COLOR)
+            neptune.rings.append((n_np, "neptun_ring.jpg"))
 
     def _get(self, name: str) -> Planet:
         for p in self.planets:
@@ -506,8 +920,12 @@ class SolarSystemApp(ShowBase):
         # Текстура прев'ю
         texture_file = getattr(target, "texture_file", None)
         if texture_file:
-            self.info_image = OnscreenImage(image=texture_file, pos=(-1.25, 0, 0.82), scale=(0.12, 1, 0.12))
+            # Картка з placeholder-кольором; текстура приходить у фоні, як і в самих тіл
+            card = CardMaker("info-image")
+            card.setFrame(-1, 1, -1, 1)
+            self.info_image = OnscreenImage(image=NodePath(card.generate()), pos=(-1.25, 0, 0.82), scale=(0.12, 1, 0.12))
             self.info_image.setTransparency(True)
+            self.textures.apply(self.info_image, texture_file, LOW_TEXTURE_SIZE, placeholder=PLACEHOLDER_COLOR)
 
         # Базовий текст із реальних словників
         base_lines = []
@@ -593,7 +1011,7 @@ class SolarSystemApp(ShowBase):
     def focus_on_planet(self, name):
         planet = self.planet_dict.get(name)
         if planet:
-            self.follow_target = planet
+            self.follow(planet)
             self.show_info(planet)
 
     def focus_on_next_moon(self):
@@ -614,11 +1032,21 @@ class SolarSystemApp(ShowBase):
         self.moon_focus_index[planet.name] = idx
 
         moon = planet.moons[idx]
-        self.follow_target = moon
+        self.follow(moon)
         self.show_info(moon)
 
+    def follow(self, target):
+        # Камера стежить за target; детальна текстура - лише в нього
+        if self.follow_target is target:
+            return
+        if self.follow_target:
+            self.follow_target.set_detail(False)
+        self.follow_target = target
+        if target:
+            target.set_detail(True)
+
     def reset_camera(self):
-        self.follow_target = None
+        self.follow(None)
         self.cam_angle_h = 0.0
         self.cam_angle_p = 20.0
         self.cam_distance = 150 * SCALE_FACTOR
@@ -626,16 +1054,34 @@ class SolarSystemApp(ShowBase):
         self.update_weight_hint()
 
     def speed_up(self):
-        self.time_factor *= 2.0
-        self.time_text.setText(f"Час: x{self.time_factor:.2f}")
+        self.clock.time_factor *= 2.0
+        self.update_time_text()
 
     def slow_down(self):
-        self.time_factor *= 0.5
-        self.time_text.setText(f"Час: x{self.time_factor:.2f}")
+        self.clock.time_factor *= 0.5
+        self.update_time_text()
 
     def reset_time(self):
-        self.time_factor = 1.0
-        self.time_text.setText("Час: x1.00")
+        self.clock.time_factor = 1.0
+        self.update_time_text()
+
+    def toggle_pause(self):
+        self.clock.paused = not self.clock.paused
+        self.update_time_text()
+
+    def seek_time(self, t):
+        # Перейти на момент t симульованого часу: одразу виставляє всі тіла, без проходу кадрами
+        self.clock.seek(t)
+        self.apply_time()
+        self.update_time_text()
+
+    def scrub_time(self, delta):
+        # delta - у секундах при x1; з прискоренням крок більшає, щоб прокрутка лишалась помітною
+        self.seek_time(self.clock.time + delta * self.clock.time_factor)
+
+    def update_time_text(self):
+        pause = " (пауза)" if self.clock.paused else ""
+        self.time_text.setText(f"Час: x{self.clock.time_factor:.2f}{pause}")
 
     # ==== Маса людини: кнопки [ та ] ====
     def increase_mass(self):
@@ -680,6 +1126,7 @@ class SolarSystemApp(ShowBase):
                     "0 – скинути камеру\n"
                     "+ / - – прискорити / сповільнити час\n"
                     "= або r – скинути час\n"
+                    "пробіл – пауза, , / . – прокрутити час назад / вперед\n"
                     "[ / ] – зменшити / збільшити масу людини\n"
                     "i – показати/сховати інформацію\n"
                     "c – порівняння розмірів (без Сонця, орбіт, поясу)\n"
@@ -727,7 +1174,7 @@ class SolarSystemApp(ShowBase):
                 p.model.setPos(x_offset, 0, 0)
                 x_offset += p.radius * spacing
 
-            self.follow_target = None
+            self.follow(None)
             self.cam_angle_h = 0.0
             self.cam_angle_p = 10.0
             self.cam_distance = 220 * SCALE_FACTOR
@@ -752,24 +1199,40 @@ class SolarSystemApp(ShowBase):
     # =========================
     # Оновлення
     # =========================
-    def update_task(self, task):
-        dt = globalClock.getDt()
+    def apply_time(self):
+        # Усі тіла - на поточний момент годинника симуляції
+        t = self.clock.time
 
         # Сонце
         if not self.comparison_mode:
-            self.sun.setH(self.sun.getH() + self.sun_spin_speed * dt * self.time_factor)
-            self.pulse_time += dt * self.pulse_speed * self.time_factor
-            intensity = 1.0 + self.pulse_strength * math.sin(self.pulse_time)
+            self.sun.setH(self.sun_spin_speed * t % 360.0)
+            intensity = 1.0 + self.pulse_strength * math.sin(self.pulse_speed * t)
             self.sun_mat.setEmission((intensity, intensity * 0.95, 0.0, 1.0))
             self.sun.setMaterial(self.sun_mat)
 
         # Планети та місяці
         for p in self.planets:
-            p.update(dt, self.time_factor)
+            p.update(t)
 
         # Пояс астероїдів
         if not self.comparison_mode:
-            self.asteroid_belt.update(dt, self.time_factor)
+            self.asteroid_belt.update(t)
+
+    def texture_task(self, task):
+        self.textures.poll()
+        if self.textures_ready_time is None and not self.textures.pending():
+            self.textures_ready_time = time.perf_counter() - self.start_time
+            print(f"Текстури завантажено за {self.textures_ready_time:.2f} с")
+        return task.cont
+
+    def first_frame_task(self, task):
+        self.first_frame_time = time.perf_counter() - self.start_time
+        print(f"Перший кадр за {self.first_frame_time:.2f} с")
+        return task.done
+
+    def update_task(self, task):
+        self.clock.advance(globalClock.getDt())
+        self.apply_time()
 
         # Камера
         if self.follow_target and not self.comparison_mode:
@@ -800,5 +1263,12 @@ class SolarSystemApp(ShowBase):
 # Запуск
 # =========================
 if __name__ == "__main__":
-    app = SolarSystemApp()
+    import sys
+    # --build-textures: лише підготувати кеш текстур (TEXTURE_CACHE_DIR) і вийти
+    if "--build-textures" in sys.argv:
+        build_texture_cache(sorted(glob.glob("*.jpg") + glob.glob("*.png")))
+        sys.exit(0)
+    # --asteroids N: кількість астероїдів у поясі
+    count = int(sys.argv[sys.argv.index("--asteroids") + 1]) if "--asteroids" in sys.argv else 400
+    app = SolarSystemApp(asteroid_count=count)
     app.run()